@@ -0,0 +1,61 @@
+'''
+Accuracy and speed of the cumulative integral index, `maatpy.classes.Integral`,
+against integrating each window from scratch with `scipy.integrate.simpson()`,
+as done by `maatpy.fit.area_under_peak()`.
+Run as `python3 accuracy_integral.py` from the root of the repository.
+'''
+import os
+import sys
+import timeit
+import numpy as np
+import scipy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from maatpy.classes import Spectrum
+
+
+def simpson_window(spectrum, xmin, xmax):
+    window = spectrum.window(xmin, xmax)
+    x = spectrum.x[window]
+    area = scipy.integrate.simpson(spectrum.y[window], x=x)
+    error = np.sqrt(scipy.integrate.simpson(spectrum.error[window]**2, x=x))
+    return area, error
+
+
+rng = np.random.default_rng(0)
+x = np.sort(rng.uniform(0, 100, 4000))
+x[0], x[-1] = 0, 100
+y = np.exp(-(x - 40)**2 / 20) + 0.5 * np.exp(-(x - 70)**2 / 5) + 0.1
+error = 0.01 + 0.05 * np.sqrt(y)
+spectrum = Spectrum(x, y, error)
+integral = spectrum.integral()
+
+# Windows with limits on the points of the data, covering the same points as Simpson
+starts = rng.integers(0, 3900, 1000)
+stops = starts + rng.integers(2, 100, 1000)
+xmin, xmax = x[starts], x[stops]
+areas, errors = integral.area(xmin, xmax)
+reference = np.array([simpson_window(spectrum, a, b) for a, b in zip(xmin, xmax)])
+print(f'Limits on the points:  max relative deviation from Simpson   area {np.max(np.abs(areas / reference[:, 0] - 1)):.2e}   error {np.max(np.abs(errors / reference[:, 1] - 1)):.2e}')
+
+# Windows with arbitrary limits, against the exact integral of the signal
+xmin = rng.uniform(0, 90, 1000)
+xmax = xmin + rng.uniform(1, 10, 1000)
+exact = np.array([scipy.integrate.quad(lambda t: np.exp(-(t - 40)**2 / 20) + 0.5 * np.exp(-(t - 70)**2 / 5) + 0.1, a, b)[0] for a, b in zip(xmin, xmax)])
+simpson = np.array([simpson_window(spectrum, a, b)[0] for a, b in zip(xmin, xmax)])
+areas = integral.integrate(xmin, xmax)
+print(f'Arbitrary limits:      max absolute deviation from the exact area   index {np.max(np.abs(areas - exact)):.2e}   Simpson {np.max(np.abs(simpson - exact)):.2e}')
+assert np.max(np.abs(areas - exact)) <= np.max(np.abs(simpson - exact))
+
+# Upper limits at the last point, as with the default xmax of maatpy.normalize.area(), must give the full integral
+coarse = np.linspace(-3, 0, 21)
+gaussian = Spectrum(coarse, np.exp(-coarse**2 / 2))
+full = scipy.integrate.simpson(gaussian.y, x=coarse)
+areas = np.append(gaussian.integral().integrate(), gaussian.integral().integrate([-3.0, -3.0], [0.0, 1.0]))
+exact = np.sqrt(np.pi / 2) * scipy.special.erf(3 / np.sqrt(2))
+print(f'Up to the last point:  areas {areas[0]:.4f} {areas[1]:.4f} {areas[2]:.4f}   Simpson {full:.4f}   exact {exact:.4f}')
+assert np.allclose(areas, full)
+
+time_simpson = min(timeit.repeat(lambda: [simpson_window(spectrum, a, b) for a, b in zip(xmin, xmax)], number=1, repeat=3))
+time_index = min(timeit.repeat(lambda: integral.area(xmin, xmax), number=1, repeat=3))
+time_build = min(timeit.repeat(lambda: Spectrum(x, y, error).integral(), number=1, repeat=3))
+print(f'1000 windows:          Simpson {time_simpson*1e3:8.2f} ms   index {time_index*1e3:8.3f} ms (+{time_build*1e3:.2f} ms to build)   speedup x{time_simpson/time_index:.0f}')
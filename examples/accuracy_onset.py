@@ -0,0 +1,37 @@
+'''
+Accuracy of the automatic plateau onset, `maatpy.fit.plateau_onset()`, used by
+`maatpy.deuteration.impulse_approx(threshold=None)`, on synthetic decays towards a plateau
+with random noise, with and without an error column.
+Run as `python3 accuracy_onset.py` from the root of the repository.
+'''
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from maatpy import fit
+from maatpy.classes import Spectra, Spectrum
+
+
+sigma = 0.05
+x = np.arange(0, 1000.0)
+true_onset = 80 * np.log(5 / sigma)  # Where the decay falls below the noise, about 368
+rng = np.random.default_rng(0)
+
+for label, with_errors in [('without errors', False), ('with errors', True)]:
+    onsets = []
+    for seed in range(100):
+        y = 1 + 5 * np.exp(-x / 80) + rng.normal(0, sigma, len(x))
+        error = np.full(len(x), sigma) if with_errors else None
+        spectra = Spectra(data=[Spectrum(x, y, error)])
+        onsets.append(fit.plateau_onset(spectra))
+    onsets = np.array(onsets)
+    print(f'1 + 5 exp(-x/80), noise {sigma}, {label}:  true onset {true_onset:.0f}   '
+          f'found median {np.median(onsets):.0f}, 5-95% {np.percentile(onsets, 5):.0f}-{np.percentile(onsets, 95):.0f}, max {onsets.max():.0f}')
+    assert abs(np.median(onsets) - true_onset) < 50
+    assert np.percentile(onsets, 95) < true_onset + 100
+
+# A flat plateau is stable from the first point
+y = 1 + rng.normal(0, sigma, len(x))
+onset = fit.plateau_onset(Spectra(data=[Spectrum(x, y)]))
+print(f'Flat plateau:  onset {onset:.0f}')
+assert onset < 50
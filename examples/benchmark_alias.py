@@ -0,0 +1,37 @@
+'''
+Benchmark of the reverse index used to resolve aliases, `maatpy.alias.find()`,
+against the previous linear scan over the lists of `maatpy.alias.unit`.
+Run as `python3 benchmark_alias.py` from the root of the repository.
+'''
+import os
+import sys
+import random
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from maatpy import alias
+
+
+def linear_scan(units):
+    keys = []
+    for unit in units:
+        for key, value in alias.unit.items():
+            if unit in value:
+                keys.append(key)
+                break
+        else:
+            keys.append(None)
+    return keys
+
+
+def reverse_index(units):
+    return [alias.find(unit, alias.unit) for unit in units]
+
+
+variants = [variant for values in alias.unit.values() for variant in values]
+for size in [1_000, 100_000, 1_000_000]:
+    units = random.choices(variants, k=size)
+    assert linear_scan(units[:1000]) == reverse_index(units[:1000])
+    number = max(1, 100_000 // size)
+    time_scan = min(timeit.repeat(lambda: linear_scan(units), number=number, repeat=3)) / number
+    time_index = min(timeit.repeat(lambda: reverse_index(units), number=number, repeat=3)) / number
+    print(f'{size:>9} units:  linear scan {time_scan*1e3:9.2f} ms   reverse index {time_index*1e3:9.2f} ms   speedup x{time_scan/time_index:.2f}')
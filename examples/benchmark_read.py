@@ -0,0 +1,47 @@
+'''
+Benchmark of the reader for MANTID CSV files, `maatpy.files.read_mantid()`, which parses the numbers
+with the pyarrow engine of pandas, against the previous loaders: the default `pd.read_csv()`
+followed by `sort_values()`, and `np.loadtxt()`.
+Run as `python3 benchmark_read.py` from the root of the repository.
+'''
+import os
+import sys
+import tempfile
+import timeit
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from maatpy import files
+
+
+def pandas_loader(filename):
+    df = pd.read_csv(filename, comment='#')
+    df = df.sort_values(by=df.columns[0])
+    return df
+
+
+def loadtxt_loader(filename):
+    return np.loadtxt(filename, delimiter=',', comments='#', ndmin=2).T
+
+
+def mantid_loader(filename):
+    return files.read_mantid(filename)
+
+
+folder = tempfile.mkdtemp()
+for rows in [4_000, 100_000, 1_000_000, 3_000_000]:
+    filename = os.path.join(folder, f'mantid_{rows}.csv')
+    x = np.arange(rows) * 0.5
+    y = np.random.rand(rows)
+    e = np.random.rand(rows) * 0.01
+    with open(filename, 'w') as f:
+        f.write('# X , Y , E Distribution=false\n\n')
+        np.savetxt(f, np.column_stack([x, y, e]), delimiter=',', fmt='%.6g')
+    number = max(1, 40_000 // rows)
+    time_pandas = min(timeit.repeat(lambda: pandas_loader(filename), number=number, repeat=5)) / number
+    time_loadtxt = min(timeit.repeat(lambda: loadtxt_loader(filename), number=number, repeat=3)) / number
+    time_mantid = min(timeit.repeat(lambda: mantid_loader(filename), number=number, repeat=5)) / number
+    print(f'{rows:>9} rows:  pandas {time_pandas*1e3:8.2f} ms   loadtxt {time_loadtxt*1e3:8.2f} ms   read_mantid {time_mantid*1e3:8.2f} ms'
+          f'   speedup x{time_pandas/time_mantid:.2f} over pandas, x{time_loadtxt/time_mantid:.2f} over loadtxt')
+    os.remove(filename)
+os.rmdir(folder)
@@ -0,0 +1,42 @@
+'''
+Check that the changes made to `maatpy.classes.Spectra.dataframe` are read back into `Spectra.data`,
+keeping the units of each dataset, and that the dataframes are rebuilt after the data changes,
+as with `Spectra.set_units()`, so that stale dataframes never overwrite the data.
+Run as `python3 check_dataframe.py` from this folder.
+'''
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from maatpy import classes, log
+
+log.quiet()
+ins = classes.Spectra(type='INS', filename=['ins.csv', 'ins.csv'], units='meV', units_in='cm-1')
+dataframes = ins.dataframe
+spectrum = ins.data[0]
+assert ins.data[0] is spectrum, 'unchanged dataframes must not rebuild the data'
+assert ins.to_units('meV').data[0].unit == 'meV'
+
+# Changes made to the dataframes are read back, with the same units
+dataframes = ins.dataframe
+dataframes[0].iloc[5, 1] = 99.0
+assert ins.data[0].y[5] == 99.0
+assert ins.data[0].unit == 'meV'
+assert ins.to_units('cm-1').data[0].unit == 'cm-1'
+
+# Changes made to the data are shown in the next dataframes
+ins.data[1].y = ins.data[1].y * 2
+assert ins.dataframe[1].iloc[5, 1] == 2 * spectrum.y[5]
+
+# Unit conversions rebuild the dataframes, and stale dataframes are not read back
+dataframes = ins.dataframe
+x = ins.data[0].x[5]
+ins.set_units('cm-1')
+assert ins.dataframe[0].columns[0] == 'Energy transfer / cm-1'
+assert abs(ins.dataframe[0].iloc[5, 0] - ins.data[0].x[5]) < 1e-9
+assert abs(ins.data[0].x[5] / x - 8.0655) < 1e-3
+dataframes[0].iloc[5, 1] = -1.0
+assert ins.data[0].y[5] == 99.0, 'stale dataframes must not overwrite the data'
+ins.dataframe[0].iloc[6, 1] = -1.0
+assert ins.data[0].y[6] == -1.0 and ins.data[0].unit == 'cm-1'
+assert abs(ins.data[0].x[5] / x - 8.0655) < 1e-3
+print('Spectra.dataframe -> Spectra.data -> Spectra.set_units(): OK')
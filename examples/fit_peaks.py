@@ -0,0 +1,25 @@
+'''
+Fit of the main band of the example MAPbI$_3$ INS data and the weaker band below it,
+with `maatpy.fit.multipeak()`, sharing the same width for both peaks.
+Run as `python3 fit_peaks.py` from this folder.
+'''
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from maatpy import classes, fit, log
+
+log.quiet()
+ins = classes.Spectra(type='INS', filename='ins.csv', units_in='cm-1', units='meV')
+peaks = [
+    {'shape': 'pseudo_voigt', 'center': [35.8, 35.0, 36.5]},
+    {'shape': 'gaussian', 'center': [32.3, 31.5, 33.0], 'fwhm': 'fwhm0'},
+    ]
+result = fit.multipeak(ins, peaks, background='linear', xrange=[28.0, 40.0])
+print(result.dataframe().to_string(index=False, float_format='{:.4g}'.format))
+print(f'Reduced chi-squared: {result.chi2:.3g}')
+
+start = time.perf_counter()
+for _ in range(100):
+    fit.multipeak(ins, peaks, background='linear', xrange=[28.0, 40.0])
+print(f'{100 / (time.perf_counter() - start) * 60:.0f} fits per minute')
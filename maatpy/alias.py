@@ -2,10 +2,14 @@
 # Description
 This module contains common dictionaries to normalize and correct user inputs.
 
+Use `find()` to get the standard key of any of the variants, as in `find('mev', unit)` returning `'meV'`.
+
 # Index
+- `find()`
 - `unit`
 - `parameters`
 - `experiment`
+- `profile`
 - `file`
 - `boolean`
 
@@ -24,10 +28,13 @@ unit: dict = {
     'cal'  : ['cal', 'Cal', 'CAL', 'calorie', 'calories', 'Calorie', 'Calories', 'CALORIE', 'CALORIES'],
     'kcal' : ['kcal', 'Kcal', 'KCAL', 'kilocalorie', 'kilocalories', 'Kilocalorie', 'Kilocalories', 'KILOCALORIE', 'KILOCALORIES'],
     'Ry'   : ['Ry', 'ry', 'RY', 'rydberg', 'rydbergs', 'Rydberg', 'Rydbergs', 'RYDBERG', 'RYDBERGS'],
+    'THz'  : ['THz', 'thz', 'THZ', 'Thz', 'terahertz', 'Terahertz', 'TERAHERTZ'],
+    'K'    : ['K', 'kelvin', 'kelvins', 'Kelvin', 'Kelvins', 'KELVIN', 'KELVINS'],
     'cm-1' : ['cm^{-1}', 'cm1', 'cm-1', 'cm^-1', 'Cm1', 'Cm-1', 'Cm^-1', 'Cm^{-1}', 'CM1', 'CM-1', 'CM^-1', 'CM^{-1}'],
     'cm'   : ['cm', 'CM', 'Cm', 'centimeter', 'centimeters', 'Centimeter', 'Centimeters', 'CENTIMETER', 'CENTIMETERS'],
     'A'    : ['A', 'a', 'AA', 'aa', 'angstrom', 'angstroms', 'Angstrom', 'Angstroms', 'ANGSTROM', 'ANGSTROMS'],
     'bohr' : ['bohr', 'Bohr', 'BOHR', 'bohr', 'Bohr', 'BOHR', 'bohrradii', 'Bohrradii', 'BOHRRADII'],
+    'nm'   : ['nm', 'NM', 'Nm', 'nanometer', 'nanometers', 'Nanometer', 'Nanometers', 'NANOMETER', 'NANOMETERS'],
     'm'    : ['m', 'M', 'meter', 'meters', 'Meter', 'Meters', 'METER', 'METERS'],
     'deg'  : ['deg', 'DEG', 'Deg', 'degree', 'degrees', 'Degree', 'Degrees', 'DEGREE', 'DEGREES'],
     'rad'  : ['rad', 'RAD', 'Rad', 'radian', 'radians', 'Radian', 'Radians', 'RADIAN', 'RADIANS'],
@@ -57,6 +64,15 @@ experiment: dict = {
 Dictionary with the available experiment types.
 '''
 
+profile: dict = {
+    'gaussian'     : ['gaussian', 'Gaussian', 'GAUSSIAN', 'gauss', 'Gauss', 'GAUSS', 'normal', 'Normal', 'G', 'g'],
+    'lorentzian'   : ['lorentzian', 'Lorentzian', 'LORENTZIAN', 'lorentz', 'Lorentz', 'LORENTZ', 'cauchy', 'Cauchy', 'L', 'l'],
+    'pseudo_voigt' : ['pseudo_voigt', 'pseudovoigt', 'pseudo-voigt', 'PseudoVoigt', 'Pseudo-Voigt', 'PSEUDOVOIGT', 'voigt', 'Voigt', 'VOIGT', 'pV', 'pv', 'PV'],
+}
+'''
+Dictionary with the available peak profiles, see `maatpy.fit.multipeak()`.
+'''
+
 file = {
     'file'  : ['file', 'files', 'File', 'Files', 'FILE', 'FILES', 'f', 'F'],
     'dir'   : ['dir', 'Dir', 'DIR', 'directory', 'Directory', 'DIRECTORY', 'd', 'D', 'folder', 'Folder', 'FOLDER'],
@@ -74,3 +90,69 @@ boolean= {
 Strings with booleans such as 'yes' / 'no'.
 '''
 
+
+
+_indexes: dict = {}
+'''Reverse lookups of the dicts used with `find()`, as `{id(dict): (dict, sizes, exact, folded)}`.'''
+
+
+def find(
+        value,
+        aliases:dict,
+        default=None,
+    ):
+    '''
+    Get the standard key of a `value` in one of the dicts of this module, such as `unit`, `experiment` or `boolean`.
+    The lookup is done in constant time through a reverse index, built the first time that each dict is used,
+    and rebuilt if a value is not found and any of the lists of the dict changed its length.
+    Strings are also matched ignoring surrounding spaces, and ignoring case
+    unless that is ambiguous, as with `'M'` and `'m'`; exact matches always take precedence.
+    Units are never matched ignoring case, since prefixes such as `'M'` and `'m'` have different meanings,
+    so that `find('MeV', unit)` returns `default` instead of `'meV'`.
+    Returns `default` if the value is not found.
+    '''
+    index = _indexes.get(id(aliases))
+    if index is not None and index[0] is aliases:
+        try:
+            return index[2][value]
+        except KeyError:
+            pass
+        except TypeError:  # Unhashable values
+            return default
+    sizes = tuple(len(variants) for variants in aliases.values())
+    if index is None or index[0] is not aliases or index[1] != sizes:
+        # The dict is kept in the index, so that its id is not reused by another dict
+        index = (aliases, sizes, *_reverse(aliases))
+        _indexes[id(aliases)] = index
+    _, _, exact, folded = index
+    try:
+        if value in exact:
+            return exact[value]
+    except TypeError:
+        return default
+    if not isinstance(value, str):
+        return default
+    if aliases is unit:
+        return exact.get(value.strip(), default)
+    return folded.get(value.strip().casefold(), default)
+
+
+def _reverse(aliases:dict) -> tuple:
+    '''Build the exact and the case-insensitive reverse lookups of a dict of aliases, as `{variant: key}`.'''
+    exact = {}
+    folded = {}
+    ambiguous = set()
+    for key, variants in aliases.items():
+        for variant in [key] + list(variants):
+            try:
+                exact.setdefault(variant, key)
+            except TypeError:
+                continue
+            if not isinstance(variant, str):
+                continue
+            variant = variant.strip().casefold()
+            if folded.setdefault(variant, key) != key:
+                ambiguous.add(variant)
+    for variant in ambiguous:
+        del folded[variant]
+    return exact, folded
@@ -0,0 +1,191 @@
+'''
+# Description
+This module manages the binary cache of parsed spectral data files.
+The cache is disabled by default; enable it with `maatpy.classes.Spectra(cache=True)`,
+or by calling `maatpy.files.read(filename, cache=True)`.
+
+The parsed and sorted columns of each file are stored as a `.npy` array inside a sidecar
+`.maatpy_cache/` folder, next to the original file. Alternatively, a common cache folder can be used
+by passing its path instead of `True`, as in `cache='path/to/cache/'`.
+Each entry is keyed by the path, size, modification time and content hash of the original file.
+When the file has not changed, the cached array is memory-mapped instead of parsing the text again.
+Outdated entries are invalidated and replaced automatically, and entries whose original file
+no longer exists are removed the first time that new entries are written to a cache folder.
+
+# Index
+- `load()`
+- `save()`
+- `prune()`
+- `clear()`
+
+---
+'''
+
+
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from . import log
+
+
+folder_name = '.maatpy_cache'
+'''Name of the sidecar folder where the cached files are stored, next to the original files.'''
+
+_version = 1
+'''Version of the cache format. Entries with a different version are invalidated.'''
+
+_pruned = set()
+'''Cache folders that have already been pruned in the current session.'''
+
+
+def load(
+        filename:str,
+        cache=True,
+    ) -> tuple:
+    '''
+    Load the cached columns of `filename`.
+    Returns a tuple with the column names and a memory-mapped array with one row per column,
+    or `None` if there is no valid entry in the cache.
+    The array is mapped as copy-on-write, so changes are kept in memory and never written back to the cache.
+    Outdated entries are removed.
+    '''
+    npy, meta = _paths(filename, cache)
+    if not os.path.exists(npy) or not os.path.exists(meta):
+        return None
+    try:
+        with open(meta, 'r') as f:
+            key = json.load(f)
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return None
+    if key.get('version') != _version or key.get('path') != os.path.abspath(filename) or key.get('size') != stat.st_size:
+        _remove(npy, meta)
+        return None
+    if key.get('mtime') != stat.st_mtime_ns:
+        # The file was touched, check whether the content actually changed
+        if key.get('hash') != _hash(filename):
+            _remove(npy, meta)
+            return None
+        key['mtime'] = stat.st_mtime_ns
+        _write_json(meta, key)
+    try:
+        data = np.load(npy, mmap_mode='c')
+    except (OSError, ValueError):
+        _remove(npy, meta)
+        return None
+    return key['columns'], data
+
+
+def save(
+        filename:str,
+        columns:list,
+        data,
+        cache=True,
+    ) -> None:
+    '''
+    Save the parsed `data` of `filename` to the cache, with the given `columns` names.
+    The `data` array must have one row per column.
+    If the cache folder can not be written, the data is simply not cached.
+    '''
+    npy, meta = _paths(filename, cache)
+    folder = os.path.dirname(npy)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        if folder not in _pruned:
+            prune(folder)
+        stat = os.stat(filename)
+        key = {
+            'version': _version,
+            'path': os.path.abspath(filename),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': _hash(filename),
+            'columns': [str(column) for column in columns],
+        }
+        temp = _temp(npy)
+        with open(temp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(data, dtype=float))
+        os.replace(temp, npy)
+        _write_json(meta, key)
+    except OSError as error:
+        log.warning(f'Could not cache {filename}  ->  {error}')
+
+
+def prune(folder:str) -> int:
+    '''
+    Remove the entries of a cache `folder` whose original files no longer exist or have changed size.
+    Returns the number of removed entries.
+    '''
+    _pruned.add(folder)
+    removed = 0
+    if not os.path.isdir(folder):
+        return removed
+    for name in os.listdir(folder):
+        if not name.endswith('.json'):
+            continue
+        meta = os.path.join(folder, name)
+        npy = meta[:-len('.json')] + '.npy'
+        try:
+            with open(meta, 'r') as f:
+                key = json.load(f)
+            outdated = os.path.getsize(key['path']) != key['size']
+        except (OSError, ValueError, KeyError):
+            outdated = True
+        if outdated or not os.path.exists(npy):
+            _remove(npy, meta)
+            removed += 1
+    return removed
+
+
+def clear(folder:str) -> None:
+    '''Remove all the cached entries in a cache `folder`.'''
+    if not os.path.isdir(folder):
+        return
+    for name in os.listdir(folder):
+        if name.endswith('.npy') or name.endswith('.json') or name.endswith('.tmp'):
+            os.remove(os.path.join(folder, name))
+
+
+def _paths(filename:str, cache) -> tuple:
+    '''Get the paths of the cached `.npy` array and its `.json` key.'''
+    filename = os.path.abspath(filename)
+    if isinstance(cache, str):
+        folder = os.path.abspath(cache)
+    else:
+        folder = os.path.join(os.path.dirname(filename), folder_name)
+    path_hash = hashlib.sha1(filename.encode()).hexdigest()[:12]
+    entry = os.path.join(folder, f'{os.path.basename(filename)}.{path_hash}')
+    return entry + '.npy', entry + '.json'
+
+
+def _hash(filename:str) -> str:
+    '''Hash of the content of a file.'''
+    content_hash = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def _write_json(path:str, key:dict) -> None:
+    '''Write a cache key atomically.'''
+    temp = _temp(path)
+    with open(temp, 'w') as f:
+        json.dump(key, f)
+    os.replace(temp, path)
+
+
+def _temp(path:str) -> str:
+    '''Temporary path to write a cache file, unique for each process and thread.'''
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+def _remove(*paths) -> None:
+    '''Remove cache files, ignoring the ones that do not exist.'''
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
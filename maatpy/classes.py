@@ -12,6 +12,9 @@ ins = mt.Spectra(
 
 # Index
 - `Spectra`. Used to load and process spectral data.
+- `Spectrum`. Compact array container for a single dataset. Used inside `Spectra.data`.
+- `Integral`. Cumulative integral of a dataset, to get the area under any range in constant time. See `Spectrum.integral()`.
+- `Moments`. Running sums of a dataset, to get the mean and deviation of any range in constant time. See `Spectrum.moments()`.
 - `Plotting`. Stores plotting options. Used inside `Spectra.plotting`.
 - `ScaleRange`. Handles data normalization inside the specified range of values. Used inside `Spectra.scale_range`.
 - `Material`. Used to store and calculate material parameters, such as molar masses and cross sections.
@@ -24,10 +27,18 @@ from . import alias
 from .constants import *
 from .elements import atom
 from . import atoms
+from . import files
+from . import log
+from . import units as energy_units
 import numpy as np
 import pandas as pd
-from copy import deepcopy
+import scipy.integrate
+import scipy.special
+from copy import copy, deepcopy
 import os
+import re
+import time
+import asyncio
 
 
 class Plotting:
@@ -199,6 +210,542 @@ class ScaleRange:
         return self
 
 
+class Spectrum:
+    '''
+    Compact container for a single dataset, with contiguous arrays for the horizontal values `x`,
+    the vertical values `y`, and the optional `error` of each point.
+    Used inside `Spectra.data`, where all the analysis functions read the data from.
+
+    The arrays are float64 by default; set `dtype=np.float32` to halve the memory usage.
+    A pandas dataframe with the same data can be obtained with `Spectrum.dataframe()`.
+
+    The points are always kept in ascending order of `x`, see `Spectrum.sort()`.
+    This allows to select x-ranges with a binary search through `Spectrum.window()` or `Spectrum.crop()`,
+    which return views of the data instead of copies.
+
+    The units of `x` are stored in `Spectrum.unit`. Linear changes of units made with `Spectrum.scale_x()`
+    are kept as a pending factor, which is only applied the next time that `x` is read,
+    so that chained conversions are folded into a single product.
+    A view of the spectrum in other units, sharing the same data, can be obtained with `Spectrum.to_units()`.
+
+    A lazy spectrum can be registered from a file with `Spectrum.lazy()`,
+    in which case the file is only read the first time that its data is accessed.
+
+    The areas under any range of the data can be computed in constant time with the `Integral`
+    returned by `Spectrum.integral()`, and the mean values with the `Moments` returned by `Spectrum.moments()`.
+    Both are built once and kept while the data is not replaced.
+    '''
+    __slots__ = ('_x', 'y', 'error', 'columns', 'unit', '_scale', '_source', '_integral', '_moments')
+
+    def __init__(
+            self,
+            x,
+            y,
+            error=None,
+            columns:list=None,
+            dtype=float,
+            unit:str=None,
+        ):
+        self._x = np.ascontiguousarray(x, dtype=dtype)
+        self._scale = 1.0
+        self.y = np.ascontiguousarray(y, dtype=dtype)
+        '''Vertical values, such as the intensity or the absorbance.'''
+        self.error = None if error is None else np.ascontiguousarray(error, dtype=dtype)
+        '''Error of the vertical values, or `None` if there are no errors.'''
+        self.columns = None
+        '''Names of the columns, used as the titles of the dataframe columns. Set them with `Spectrum.set_columns()`.'''
+        self.unit = unit
+        '''Units of the horizontal values, as in `maatpy.units`, or `None` if they are unknown.'''
+        self._source = None
+        self._integral = None
+        self._moments = None
+        self.set_columns(columns)
+        self.sort()
+
+    @classmethod
+    def from_dataframe(cls, df:pd.DataFrame, dtype=float):
+        '''Create a `Spectrum` from a dataframe, with the x, y and optional error values as the first three columns.'''
+        error = df.iloc[:, 2].to_numpy(dtype=dtype) if df.shape[1] > 2 else None
+        return cls(df.iloc[:, 0].to_numpy(dtype=dtype), df.iloc[:, 1].to_numpy(dtype=dtype), error, list(df.columns), dtype)
+
+    @classmethod
+    def from_array(cls, columns:list, data, dtype=float):
+        '''Create a `Spectrum` from the column names and an array with one row per column, as returned by `maatpy.files.read()`.'''
+        error = data[2] if len(data) > 2 else None
+        return cls(data[0], data[1], error, columns, dtype)
+
+    @classmethod
+    def _view(cls, x, y, error, columns:list, unit:str=None, scale:float=1.0):
+        '''Create a `Spectrum` from arrays that are already sorted and contiguous, without copying nor checking them.'''
+        spectrum = cls.__new__(cls)
+        spectrum._x = x
+        spectrum._scale = scale
+        spectrum.y = y
+        spectrum.error = error
+        spectrum.columns = columns
+        spectrum.unit = unit
+        spectrum._source = None
+        spectrum._integral = None
+        spectrum._moments = None
+        return spectrum
+
+    @classmethod
+    def lazy(
+            cls,
+            filename:str,
+            cache=False,
+            xrange:list=None,
+            chunksize:int=None,
+            dtype=float,
+        ):
+        '''
+        Register a `Spectrum` from a file, without reading it.
+        The file is read with `maatpy.files.read()` the first time that `x`, `y`, `error` or `columns` are accessed.
+        Changes of units made with `Spectrum.scale_x()` and names set with `Spectrum.set_columns()`
+        before that are queued, and applied once the data is read.
+        '''
+        spectrum = cls.__new__(cls)
+        spectrum._scale = 1.0
+        spectrum.unit = None
+        spectrum._source = [os.path.abspath(filename), cache, xrange, chunksize, dtype]
+        spectrum._integral = None
+        spectrum._moments = None
+        return spectrum
+
+    @property
+    def x(self):
+        '''Horizontal values, such as the energy transfer or the wavenumber.'''
+        if self._scale != 1.0:
+            self._x = self._x * self._scale
+            self._scale = 1.0
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._x = x
+        self._scale = 1.0
+
+    @property
+    def loaded(self) -> bool:
+        '''`False` if the spectrum is lazy and its file has not been read yet.'''
+        return self._source is None
+
+    def load(self):
+        '''Read the file of a lazy spectrum, applying any queued change. Does nothing if the data is already loaded.'''
+        if self._source is None:
+            return self
+        filename, cache, xrange, chunksize, dtype = self._source
+        spectrum = Spectrum.from_array(*files.read(filename, cache, xrange, chunksize), dtype=dtype)
+        self._x = spectrum._x
+        self.y = spectrum.y
+        self.error = spectrum.error
+        try:  # Names set before reading the file are kept
+            columns = object.__getattribute__(self, 'columns')
+        except AttributeError:
+            columns = spectrum.columns
+        self._source = None
+        self.set_columns(columns)
+        return self
+
+    def __getattr__(self, name):
+        # Only called for unset attributes, i.e. the data of lazy spectra that were not read yet
+        if name in ('_x', 'y', 'error', 'columns') and object.__getattribute__(self, '_source') is not None:
+            self.load()
+            return object.__getattribute__(self, name)
+        raise AttributeError(f"'Spectrum' object has no attribute '{name}'")
+
+    def __getstate__(self):
+        # Copy and pickle lazy spectra without reading them, and without the indexes, which are rebuilt if needed
+        state = {'_integral': None, '_moments': None}
+        for name in self.__slots__:
+            if name in state:
+                continue
+            try:
+                state[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        return None, state
+
+    def set_columns(self, columns:list=None):
+        '''
+        Set the names of the columns, keeping the name of the error column only if there are errors.
+        Defaults to `['X', 'Y', 'Error']`.
+        '''
+        if columns is None:
+            columns = ['X', 'Y', 'Error']
+        columns = [str(column) for column in columns][:3]
+        if self._source is not None:  # Trimmed once the data is read
+            self.columns = columns
+            return self
+        if self.error is not None and len(columns) < 3:
+            columns.append('Error')
+        elif self.error is None:
+            columns = columns[:2]
+        self.columns = columns
+        return self
+
+    def scale_x(self, factor:float):
+        '''
+        Multiply the horizontal values by a given `factor`, e.g. to change the units.
+        The factor is folded with any pending one, and only applied the next time that `x` is read.
+        For lazy spectra that were not read yet, it is applied once the data is loaded.
+        '''
+        self._scale *= factor
+        return self
+
+    def view(self):
+        '''
+        New `Spectrum` sharing the data with this one, through read-only views of its arrays.
+        Assigning new arrays to the view, as in `view.y = view.y * 2`, does not change the original spectrum,
+        and changing the shared arrays in place raises an error instead of modifying the original data.
+        '''
+        return Spectrum._view(_readonly(self._x), _readonly(self.y), _readonly(self.error), list(self.columns), self.unit, self._scale)
+
+    def to_units(self, unit:str, laser:float=None):
+        '''
+        New `Spectrum` with the horizontal values in another `unit`, as in `maatpy.units`.
+        For linear conversions, all the arrays are shared with the original spectrum through read-only views, as in `Spectrum.view()`,
+        and the new `x` is only computed if it is read; `Spectrum.window()` does not need it.
+        Non-linear conversions, such as to wavelengths, return a converted copy.
+        The `laser` wavelength for Raman spectra is used as in `maatpy.units.convert()`.
+        '''
+        if self.unit is None:
+            raise ValueError('to_units: the units of the spectrum are unknown')
+        unit = energy_units.standard(unit)
+        if energy_units.is_linear(self.unit, unit):
+            factor = energy_units.factor(self.unit, unit)
+            return Spectrum._view(_readonly(self._x), _readonly(self.y), _readonly(self.error), list(self.columns), unit, self._scale * factor)
+        spectrum = self.copy()
+        spectrum.map_x(lambda x: energy_units.convert(x, self.unit, unit, laser))
+        spectrum.unit = unit
+        return spectrum
+
+    def map_x(self, function):
+        '''
+        Replace the horizontal values by `function(x)`, e.g. for non-linear changes of units, sorting the points again.
+        Lazy spectra are read first.
+        '''
+        self.x = np.ascontiguousarray(function(self.x), dtype=self._x.dtype)
+        return self.sort()
+
+    def sort(self):
+        '''
+        Sort the points in ascending order of `x`. Called automatically when creating the `Spectrum`.
+        Data that is already sorted is kept as it is, and data in descending order is just reversed.
+        '''
+        x = self._x
+        if x.size < 2 or np.all(x[1:] >= x[:-1]):
+            return self
+        if np.all(x[1:] <= x[:-1]):
+            order = slice(None, None, -1)
+        else:
+            order = np.argsort(x, kind='stable')
+        self._x = np.ascontiguousarray(self._x[order])
+        self.y = np.ascontiguousarray(self.y[order])
+        if self.error is not None:
+            self.error = np.ascontiguousarray(self.error[order])
+        return self
+
+    def window(self, xmin:float=None, xmax:float=None) -> slice:
+        '''
+        Slice with the points inside the range `xmin <= x <= xmax`, found by binary search.
+        Any of the limits can be `None`. Use it to index the arrays, as in `Spectrum.y[Spectrum.window(xmin, xmax)]`.
+        Pending changes of units are not applied, the limits are scaled instead.
+        '''
+        start = 0 if xmin is None else self._search(xmin, 'left')
+        stop = len(self._x) if xmax is None else self._search(xmax, 'right')
+        return slice(start, stop)
+
+    def _search(self, value:float, side:str) -> int:
+        '''Binary search of `value` in `x`, as in `np.searchsorted()`, without applying the pending scale factor.'''
+        x = self._x
+        scale = self._scale
+        if scale == 1.0 or scale <= 0:
+            return int(np.searchsorted(self.x, value, side=side))
+        i = int(np.searchsorted(x, value / scale, side=side))
+        # Correct the rounding of the scaled limit, to match the comparisons with the scaled values
+        if side == 'left':
+            while i > 0 and x[i-1] * scale >= value:
+                i -= 1
+            while i < len(x) and x[i] * scale < value:
+                i += 1
+        else:
+            while i > 0 and x[i-1] * scale > value:
+                i -= 1
+            while i < len(x) and x[i] * scale <= value:
+                i += 1
+        return i
+
+    def crop(self, xmin:float=None, xmax:float=None):
+        '''New `Spectrum` with the points inside the range `xmin <= x <= xmax`, sharing memory with the original arrays.'''
+        window = self.window(xmin, xmax)
+        error = None if self.error is None else self.error[window]
+        return Spectrum._view(self._x[window], self.y[window], error, self.columns, self.unit, self._scale)
+
+    def integral(self):
+        '''
+        Cumulative `Integral` of the data, to compute the area under any range of `x` in constant time.
+        It is built the first time that it is needed, and kept until `x`, `y` or `error` are replaced by new arrays.
+        Changes made in place to writable arrays are not detected; assign new arrays instead, as in `spectrum.y = spectrum.y * 2`.
+        '''
+        x = self.x
+        cached = self._integral
+        if cached is not None and cached.x is x and cached.y is self.y and cached.error is self.error:
+            return cached
+        self._integral = Integral(x, self.y, self.error)
+        return self._integral
+
+    def moments(self):
+        '''
+        Running sums of the data as `Moments`, to compute the mean and deviation of any range of points in constant time.
+        It is built the first time that it is needed, and kept until `x`, `y` or `error` are replaced by new arrays,
+        with the same caveats as `Spectrum.integral()`.
+        '''
+        x = self.x
+        cached = self._moments
+        if cached is not None and cached.x is x and cached.y is self.y and cached.error is self.error:
+            return cached
+        self._moments = Moments(x, self.y, self.error)
+        return self._moments
+
+    def dataframe(self) -> pd.DataFrame:
+        '''Pandas dataframe with a copy of the data.'''
+        df = {self.columns[0]: self.x, self.columns[1]: self.y}
+        if self.error is not None:
+            df[self.columns[2]] = self.error
+        return pd.DataFrame(df)
+
+    def copy(self):
+        '''Copy of the spectrum, with new arrays.'''
+        return Spectrum(self.x.copy(), self.y.copy(), None if self.error is None else self.error.copy(), list(self.columns), self._x.dtype, self.unit)
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+
+class Integral:
+    '''
+    Cumulative integral of a dataset, used to compute the area under any range of `x` with two lookups.
+    Get it from a `Spectrum` with `Spectrum.integral()`.
+
+    The running integrals of `y` and of the squared `error` are precomputed once,
+    with `scipy.integrate.cumulative_simpson()` when available, or with the trapezoidal rule otherwise.
+    The area between two limits is then the difference of the running integral at both limits.
+    Limits that fall between two points are interpolated linearly inside that interval,
+    so the area covers exactly the requested range, clipped to the range of the data.
+
+    All methods accept single limits as well as arrays of limits, to integrate many ranges at once.
+    '''
+    __slots__ = ('x', 'y', 'error', 'squared_error', 'cumulative', 'cumulative_error')
+
+    def __init__(self, x, y, error=None):
+        self.x = x
+        '''Horizontal values of the dataset, in ascending order.'''
+        self.y = y
+        '''Vertical values of the dataset.'''
+        self.error = error
+        '''Errors of the vertical values, or `None`.'''
+        self.cumulative = _cumulative(x, y)
+        '''Integral of `y` from the first point up to each point.'''
+        self.squared_error = None if error is None else np.square(error, dtype=float)
+        '''Squared errors of the vertical values, or `None`.'''
+        self.cumulative_error = None if error is None else _cumulative(x, self.squared_error)
+        '''Integral of the squared errors from the first point up to each point, or `None`.'''
+
+    def integrate(self, xmin=None, xmax=None):
+        '''Integral of `y` from `xmin` to `xmax`. Any of the limits can be `None` to integrate up to the edges of the data.'''
+        return self._at(self.cumulative, self.y, xmax, True) - self._at(self.cumulative, self.y, xmin, False)
+
+    def variance(self, xmin=None, xmax=None):
+        '''Integral of the squared errors from `xmin` to `xmax`, or zero if the dataset has no errors.'''
+        if self.error is None:
+            return np.zeros(np.broadcast(xmin, xmax).shape)[()]
+        return self._at(self.cumulative_error, self.squared_error, xmax, True) - self._at(self.cumulative_error, self.squared_error, xmin, False)
+
+    def area(
+            self,
+            xmin=None,
+            xmax=None,
+            baseline=0.0,
+            baseline_error=0.0,
+        ) -> tuple:
+        '''
+        Area between `xmin` and `xmax` above a constant `baseline`, and its error.
+        The error combines the errors of the points, if any, with the `baseline_error` in each point,
+        propagated in quadrature as in `maatpy.fit.area_under_peak()`.
+        '''
+        width = self.width(xmin, xmax)
+        area = self.integrate(xmin, xmax) - np.multiply(baseline, width)
+        error = np.sqrt(self.variance(xmin, xmax) + np.multiply(np.square(baseline_error), width))
+        return area, error
+
+    def width(self, xmin=None, xmax=None):
+        '''Length of the range from `xmin` to `xmax`, clipped to the range of the data.'''
+        return self._clip(xmax, True) - self._clip(xmin, False)
+
+    def _clip(self, limit, upper:bool):
+        '''Limits clipped to the range of the data, with `None` as the edge of the data.'''
+        x = self.x
+        if len(x) == 0:
+            return np.zeros(np.shape(limit))[()] if limit is not None else 0.0
+        if limit is None:
+            return float(x[-1]) if upper else float(x[0])
+        return np.clip(limit, x[0], x[-1])
+
+    def _at(self, cumulative, values, limit, upper:bool):
+        '''
+        Running integral evaluated at the given limits, interpolating `values` linearly between points.
+        Limits at or beyond the last point return the full integral, without interpolating the last interval.
+        '''
+        x = self.x
+        if len(x) < 2:
+            return np.zeros(np.shape(limit))[()] if limit is not None else 0.0
+        if limit is None:
+            return cumulative[-1] if upper else cumulative[0]
+        limit = self._clip(limit, upper)
+        i = np.clip(np.searchsorted(x, limit, side='right') - 1, 0, len(x) - 2)
+        step = x[i+1] - x[i]
+        dx = limit - x[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            edge = np.where(step > 0, values[i] + (values[i+1] - values[i]) * dx / step, values[i])
+        return np.where(limit >= x[-1], cumulative[-1], cumulative[i] + dx * (values[i] + edge) / 2)[()]
+
+
+class Moments:
+    '''
+    Running sums of a dataset, used to get the mean and standard deviation of any range of points in constant time.
+    Get it from a `Spectrum` with `Spectrum.moments()`.
+
+    The cumulative sums of `y`, `y`$^2$ and the squared `error` are precomputed once,
+    with `y` centred on its mean to keep the precision of the variances.
+    The ranges are given as the `start` and `stop` indices of the points, as in `Spectrum.window()`,
+    and can also be arrays of indices to evaluate many ranges at once.
+    '''
+    __slots__ = ('x', 'y', 'error', 'offset', 'sum_y', 'sum_y2', 'sum_error2')
+
+    def __init__(self, x, y, error=None):
+        self.x = x
+        '''Horizontal values of the dataset, in ascending order.'''
+        self.y = y
+        '''Vertical values of the dataset.'''
+        self.error = error
+        '''Errors of the vertical values, or `None`.'''
+        centred = np.asarray(y, dtype=float)
+        self.offset = float(centred.mean()) if len(centred) else 0.0
+        '''Mean of all the points, subtracted from `y` before the sums.'''
+        centred = centred - self.offset
+        self.sum_y = np.concatenate([[0.0], np.cumsum(centred)])
+        '''Sum of the centred `y` values before each index.'''
+        self.sum_y2 = np.concatenate([[0.0], np.cumsum(centred**2)])
+        '''Sum of the squared centred `y` values before each index.'''
+        self.sum_error2 = None if error is None else np.concatenate([[0.0], np.cumsum(np.square(error, dtype=float))])
+        '''Sum of the squared errors before each index, or `None`.'''
+
+    def mean(self, start, stop):
+        '''Mean of `y` over the points from `start` to `stop`.'''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.offset + (self.sum_y[stop] - self.sum_y[start]) / np.subtract(stop, start)
+
+    def std(self, start, stop, degrees_of_freedom:int=1):
+        '''Standard deviation of `y` over the points from `start` to `stop`, with `degrees_of_freedom` as in `maatpy.fit.mean()`.'''
+        n = np.subtract(stop, start)
+        total = self.sum_y[stop] - self.sum_y[start]
+        squares = self.sum_y2[stop] - self.sum_y2[start]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (squares - total**2 / n) / (n - degrees_of_freedom)
+        return np.sqrt(np.maximum(variance, 0.0))
+
+    def mean_error(self, start, stop):
+        '''Error of the mean of `y` from the errors of the points, $\\sqrt{\\sum{\\sigma_i^2}}/N$, or zero if there are no errors.'''
+        if self.sum_error2 is None:
+            return np.zeros(np.broadcast(start, stop).shape)[()]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(self.sum_error2[stop] - self.sum_error2[start]) / np.subtract(stop, start)
+
+    def plateau(self, start, stop) -> tuple:
+        '''
+        Mean value of a plateau over the points from `start` to `stop`, and its error,
+        combining the standard deviation of the points and the errors of the points as in `maatpy.fit.plateau()`.
+        '''
+        return self.mean(start, stop), np.hypot(self.std(start, stop), self.mean_error(start, stop))
+
+    def onset(
+            self,
+            min_points:int=10,
+            tolerance:float=2.0,
+            stop:int=None,
+        ):
+        '''
+        Index of the first point of the plateau that ends at `stop`, by default the last point.
+        All the possible onsets are checked at once.
+        A plateau starting at a given point is considered stable if the means of its first and second halves
+        agree within the `tolerance`, in standard errors, corrected for the number of onsets checked.
+        The standard errors come from a single estimate of the noise of each plateau:
+        the errors of the points if there are any, or otherwise the standard deviation of all its points.
+        The onset is the first point from which all the later onsets, with at least `min_points` points, are stable.
+        Since hundreds of onsets are checked, the `tolerance` is raised with the Bonferroni correction,
+        so that the chance of a noise excursion deep in the plateau pushing the onset to the right
+        is at most that of a single check, e.g. 4.6% for `tolerance=2`.
+        Returns `None` if no stable plateau is found.
+        '''
+        stop = len(self.y) if stop is None else stop
+        min_points = max(int(min_points), 4)
+        starts = np.arange(0, stop - min_points + 1)
+        if len(starts) == 0:
+            return None
+        middles = (starts + stop) // 2
+        first = self.mean(starts, middles)
+        second = self.mean(middles, stop)
+        # Variance of the points of each plateau, from a single estimate of the noise
+        if self.sum_error2 is None:
+            variance = self.std(starts, stop)**2
+        else:
+            variance = (self.sum_error2[stop] - self.sum_error2[starts]) / (stop - starts)
+        standard_error = np.sqrt(variance * (1 / (middles - starts) + 1 / (stop - middles)))
+        # Two-sided Bonferroni correction for the number of onsets checked
+        tolerance = np.sqrt(2) * scipy.special.erfcinv(scipy.special.erfc(tolerance / np.sqrt(2)) / len(starts))
+        stable = np.abs(first - second) <= tolerance * standard_error
+        # Onsets from which all the later onsets are stable
+        stable = np.logical_and.accumulate(stable[::-1])[::-1]
+        if not stable[-1]:
+            return None
+        return int(np.argmax(stable))
+
+
+def _cumulative(x, y):
+    '''Running integral of `y` over `x`, starting at zero, as float64.'''
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2:
+        return np.zeros(len(x))
+    cumulative_simpson = getattr(scipy.integrate, 'cumulative_simpson', None)
+    if cumulative_simpson is None or len(x) < 3 or np.any(x[1:] == x[:-1]):
+        return scipy.integrate.cumulative_trapezoid(y, x=x, initial=0.0)
+    return cumulative_simpson(y, x=x, initial=0.0)
+
+
+def _snapshot(df:pd.DataFrame) -> tuple:
+    '''Column names and copies of the values of a dataframe, to check later if it was changed.'''
+    return list(df.columns), [df.iloc[:, j].to_numpy(copy=True) for j in range(df.shape[1])]
+
+
+def _unchanged(df:pd.DataFrame, snapshot:tuple) -> bool:
+    '''Check whether a dataframe still has the columns and values of a `_snapshot()`.'''
+    columns, values = snapshot
+    if list(df.columns) != columns or len(df) != (len(values[0]) if values else 0):
+        return False
+    return all(np.array_equal(df.iloc[:, j].to_numpy(), array, equal_nan=True) for j, array in enumerate(values))
+
+
+def _readonly(array):
+    '''Read-only view of an array, or `None`.'''
+    if array is None:
+        return None
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
 class Spectra:
     '''
     Spectra object. Used to load and process spectral data.
@@ -225,6 +772,47 @@ class Spectra:
     mt.plot.spectra(ins)
     ```
 
+    Large sets of files can be read in parallel by setting the number of `workers`.
+    Files that can not be read are skipped with a warning, and listed in `Spectra.failed`:
+    ```python
+    ins = mt.Spectra(
+        type='INS',
+        filename=filenames,
+        workers=8,
+        )
+    ```
+
+    Whole folders can be indexed and loaded with `Spectra.from_directory()`,
+    filtering the files by name or by their energy range without parsing the data:
+    ```python
+    ins = mt.Spectra.from_directory(
+        'beamtime/',
+        pattern='*.csv',
+        match='MAPI',
+        covers=[20, 500],
+        type='INS',
+        )
+    ```
+
+    Inside asyncio applications, files can be loaded without blocking the event loop with `Spectra.aload()`:
+    ```python
+    ins, raman = await asyncio.gather(
+        mt.Spectra.aload(filename=ins_files, type='INS'),
+        mt.Spectra.aload(filename=raman_files, type='RAMAN'),
+        )
+    ```
+
+    Processed MANTID workspaces saved as NeXus files can be loaded with `Spectra.from_nexus()`,
+    reading only the requested spectra and energy range:
+    ```python
+    ins = mt.Spectra.from_nexus(
+        'MAPI_processed.nxs',
+        indices=[0, 2],
+        xrange=[20, 500],
+        type='INS',
+        )
+    ```
+
     Check more use examples in the `/examples/` folder.
 
     Below is a list of the available parameters for the Spectra object, along with their descriptions.
@@ -240,8 +828,30 @@ class Spectra:
             units_in=None,
             plotting:Plotting=Plotting(),
             scale_range:ScaleRange=ScaleRange(),
+            workers:int=1,
+            processes:bool=False,
+            cache=False,
+            xrange:list=None,
+            chunksize:int=None,
+            dtype=float,
+            lazy:bool=False,
+            data:list=None,
         ):
-        '''All values can be set when initializing the Spectra object.'''
+        '''
+        All values can be set when initializing the Spectra object.
+        The files are read sequentially by default. To read them in parallel, set the number of `workers`,
+        or set it to `None` to use all the available CPUs. Threads are used unless `processes=True`.
+        Set `cache=True` to keep a binary copy of the parsed files, which is memory-mapped
+        the next time that the same unchanged files are loaded; see `maatpy.cache` for details.
+        To load only a window of long spectra, set `xrange=[xmin, xmax]` in the units of the input files, `units_in`.
+        The files are then streamed in chunks of `chunksize` rows, keeping only the data inside the range;
+        see `maatpy.files.read()` for details.
+        The data is stored as float64 arrays, unless another `dtype` such as `np.float32` is specified.
+        If `lazy=True`, the files are only registered at initialization, and each file is read
+        the first time that its data is accessed, applying any unit conversion made before; see `Spectrum.lazy()`.
+        Errors when reading the files are then raised at that moment.
+        Already loaded `data` can also be passed as a list of `Spectrum` objects, instead of a `dataframe`.
+        '''
         self.type = None
         '''Type of the spectra: `'INS'`, `'ATR'`, or `'RAMAN'`.'''
         self.comment = comment
@@ -256,42 +866,238 @@ class Spectra:
         Any additional line that is not data must be removed or commented with `#`.
         CSV files must be formatted with the first column as the energy or energy transfer,
         and the second column with the intensity or absorbance, depending on the case. An additional third `'Error'` column can be used.
+        Compressed CSV files, such as `.csv.gz` or `.csv.xz`, are decompressed on the fly while reading;
+        set `cache=True` to decompress and parse them only once.
         '''
-        self.dataframe = None
-        '''
-        List containing the pandas dataframes with the spectral data.
-        Loaded automatically from the filenames at initialization.
-        '''
+        self.dtype = dtype
+        '''Data type of the arrays in `Spectra.data`.'''
+        self._data = []
+        self._dataframe = None
+        self._snapshot = []
+        self._seconds = []
         self.units = None
-        '''Target units of the spectral data. Can be `'meV'` or `'cm-1'`, written as any of the variants listed in `maatpy.alias.unit[unit]`.'''
+        '''Target units of the spectral data. Can be `'meV'`, `'cm-1'` or any other unit supported by `maatpy.units`, written as any of the variants listed in `maatpy.alias.unit[unit]`.'''
         self.units_in = None
         '''
-        Input units of the spectral data, used in the input CSV files. Can be `'meV'` or `'cm-1'`, written as any of the variants listed in `maatpy.alias.unit[unit]`.
+        Input units of the spectral data, used in the input CSV files. Can be `'meV'`, `'cm-1'` or any other unit supported by `maatpy.units`, written as any of the variants listed in `maatpy.alias.unit[unit]`.
         If the input CSV files have different units, it can also be set as a list of the same length of the number of input files, eg. `['meV', 'cm-1', 'cm-1']`.
         '''
         self.plotting = plotting
         '''`Plotting` object, used to set the plotting options.'''
         self.scale_range = scale_range
         '''`ScaleRange` object, used to set the normalization parameters.'''
+        self.failed = {}
+        '''
+        Dict with the files that could not be read when loading in parallel, as `{filename: 'error message'}`.
+        These files are removed from `Spectra.filename`, along with their values in `Spectra.units`.
+        '''
 
         self = self._set_type(type)
-        self = self._set_dataframe(filename, dataframe)
+        self = self._set_dataframe(filename, dataframe, workers, processes, cache, xrange, chunksize, lazy, data)
+        if self.failed:
+            units = self._skip_failed(units, filename)
+            units_in = self._skip_failed(units_in, filename)
         self = self.set_units(units, units_in)
 
+    @classmethod
+    def from_directory(
+            cls,
+            folder:str='.',
+            pattern:str='*.csv',
+            recursive:bool=False,
+            match:str=None,
+            covers:list=None,
+            **kwargs,
+        ):
+        '''
+        Create a `Spectra` object from the files in a `folder` that match a glob `pattern`,
+        as indexed by `maatpy.files.index()`. Subfolders are also searched if `recursive=True`.
+        The files can be filtered by a regular expression that must `match` the filename,
+        and by their x-range, keeping only the files that cover the range `covers=[xmin, xmax]`,
+        in the units of the files. Any of these limits can be `None`.
+        Other keyword arguments are passed to `Spectra()`.
+        '''
+        index = files.index(folder, pattern, recursive)
+        if match is not None:
+            index = index[[re.search(match, filename) is not None for filename in index['filename']]]
+        if covers is not None:
+            if covers[0] is not None:
+                index = index[index['xmin'] <= covers[0]]
+            if len(covers) > 1 and covers[1] is not None:
+                index = index[index['xmax'] >= covers[1]]
+        return cls.from_index(index, **kwargs)
+
+    @classmethod
+    def from_index(cls, index:pd.DataFrame, **kwargs):
+        '''
+        Create a `Spectra` object from the files listed in an `index` dataframe, as returned by `maatpy.files.index()`.
+        Other keyword arguments are passed to `Spectra()`.
+        '''
+        return cls(filename=list(index['filename']), **kwargs)
+
+    @classmethod
+    async def aload(
+            cls,
+            filename=None,
+            concurrency:int=4,
+            executor=None,
+            cache=False,
+            xrange:list=None,
+            chunksize:int=None,
+            **kwargs,
+        ):
+        '''
+        Create a `Spectra` object from a list of files without blocking the asyncio event loop,
+        as in `ins = await Spectra.aload(filename=filenames, type='INS')`.
+        The files are read with `maatpy.files.read()` in the default executor of the loop,
+        or in a custom `executor`, such as a `concurrent.futures.ProcessPoolExecutor`,
+        reading at most `concurrency` files at the same time.
+        Several `Spectra` objects can thus be loaded concurrently, e.g. with `asyncio.gather()`.
+        As when reading in parallel, files that can not be read are skipped with a warning, and listed in `Spectra.failed`.
+        The `cache`, `xrange` and `chunksize` options and other keyword arguments are used as in `Spectra()`.
+        '''
+        if isinstance(filename, str):
+            filename = [filename]
+        filename = list(filename) if filename is not None else []
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def read(file):
+            async with semaphore:
+                return await loop.run_in_executor(executor, files._read_timed, file, cache, xrange, chunksize)
+
+        results = await asyncio.gather(*[read(file) for file in filename], return_exceptions=True)
+        failed = {}
+        for file, result in zip(filename, results):
+            if isinstance(result, Exception):
+                failed[file] = f'{type(result).__name__}: {result}'
+                log.warning(f'Skipping {file}  ->  {failed[file]}')
+        kept = [i for i, result in enumerate(results) if not isinstance(result, Exception)]
+        for key in ('units', 'units_in'):
+            values = kwargs.get(key)
+            if isinstance(values, list) and len(values) == len(filename):
+                kwargs[key] = [values[i] for i in kept]
+        dtype = kwargs.get('dtype', float)
+        data = [Spectrum.from_array(results[i][0], results[i][1], dtype=dtype) for i in kept]
+        spectra = cls(filename=[filename[i] for i in kept], data=data, **kwargs)
+        spectra.failed = failed
+        spectra._seconds = [results[i][2] for i in kept]
+        return spectra
+
+    @classmethod
+    def from_nexus(
+            cls,
+            filename:str,
+            indices=None,
+            xrange:list=None,
+            entry:str=None,
+            **kwargs,
+        ):
+        '''
+        Create a `Spectra` object from the spectra of a processed MANTID workspace saved as a NeXus/HDF5 file,
+        reading only the spectra listed in `indices` and the points inside `xrange=[xmin, xmax]`,
+        in the units of the file; see `maatpy.files.read_nexus()` for details.
+        Each spectrum is listed in `Spectra.filename` as `'filename[index]'`.
+        If `units_in` is not specified, it is taken from the units of the workspace x-axis.
+        Other keyword arguments are passed to `Spectra()`.
+        '''
+        results = files.read_nexus(filename, indices, xrange, entry)
+        if indices is None:
+            indices = range(len(results))
+        elif np.ndim(indices) == 0:
+            indices = [indices]
+        if kwargs.get('units_in') is None:
+            kwargs['units_in'] = files.nexus_unit(filename, entry)
+        dtype = kwargs.get('dtype', float)
+        data = [Spectrum.from_array(columns, values, dtype=dtype) for columns, values in results]
+        return cls(filename=[f'{filename}[{i}]' for i in indices], data=data, **kwargs)
+
+    @classmethod
+    def from_parquet(
+            cls,
+            filename:str,
+            indices=None,
+            errors:bool=True,
+        ):
+        '''
+        Load a `Spectra` object saved with `Spectra.to_parquet()`, with its data, units, type, `Plotting` and `ScaleRange`.
+        The data is read back as it was saved, so no file is parsed nor processed again.
+        Only the datasets listed in `indices` are read, and the `Error` columns are skipped if `errors=False`;
+        see `maatpy.files.read_parquet()` for details.
+        '''
+        results, metadata = files.read_parquet(filename, indices, errors)
+        if indices is None:
+            indices = range(len(metadata['rows']))
+        elif np.ndim(indices) == 0:
+            indices = [indices]
+
+        def pick(values):
+            return [values[i] for i in indices] if isinstance(values, list) else values
+
+        data = []
+        for (x, y, error), columns in zip(results, pick(metadata['columns'])):
+            data.append(Spectrum(x, y, error, columns, x.dtype))
+        plotting = Plotting()
+        for key, value in metadata['plotting'].items():
+            setattr(plotting, key, value)
+        scale_range = ScaleRange()
+        for key, value in metadata['scale_range'].items():
+            setattr(scale_range, key, value)
+        spectra = cls(
+            type=metadata['type'],
+            comment=metadata['comment'],
+            save_as=metadata['save_as'],
+            filename=pick(metadata['filename']),
+            units=pick(metadata['units']),
+            plotting=plotting,
+            scale_range=scale_range,
+            dtype=data[0].x.dtype if data else float,
+            data=data,
+        )
+        spectra.units_in = pick(metadata['units_in'])
+        for spectrum, columns in zip(spectra.data, pick(metadata['columns'])):
+            spectrum.set_columns(columns)
+        return spectra
+
+    def to_parquet(self, filename:str) -> None:
+        '''
+        Save the `Spectra` object to a single columnar Parquet file, to be loaded again with `Spectra.from_parquet()`.
+        All the datasets are stored with their current values, e.g. after a change of units or a normalization,
+        along with the type, units, comment, filenames, `Plotting` and `ScaleRange`.
+        Requires the optional `pyarrow` package; see `maatpy.files.write_parquet()` for details.
+        '''
+        metadata = {
+            'version': 1,
+            'type': self.type,
+            'comment': self.comment,
+            'save_as': self.save_as,
+            'filename': self.filename,
+            'units': self.units,
+            'units_in': self.units_in,
+            'columns': [spectrum.columns for spectrum in self.data],
+            'plotting': vars(self.plotting),
+            'scale_range': vars(self.scale_range),
+        }
+        files.write_parquet(filename, [(spectrum.x, spectrum.y, spectrum.error) for spectrum in self.data], metadata)
+
     def _set_type(self, type):
         '''Set and normalize the type of the spectra: `INS`, `ATR`, or `RAMAN`.'''
-        if type in alias.experiment['INS']:
-            self.type = 'INS'
-        elif type in alias.experiment['ATR']:
-            self.type = 'ATR'
-        elif type in alias.experiment['RAMAN']:
-            self.type = 'RAMAN'
-        else:
-            self.type = type
+        self.type = alias.find(type, alias.experiment, type)
         return self
 
-    def _set_dataframe(self, filename, dataframe):
-        '''Set the dataframes, from the given files or dataframes.'''
+    def _set_dataframe(
+            self,
+            filename,
+            dataframe,
+            workers:int=1,
+            processes:bool=False,
+            cache=False,
+            xrange:list=None,
+            chunksize:int=None,
+            lazy:bool=False,
+            data:list=None,
+        ):
+        '''Set the dataframes, from the given files, dataframes or `Spectrum` data.'''
         if isinstance(filename, list):
             self.filename = filename
         elif isinstance(filename, str):
@@ -299,30 +1105,144 @@ class Spectra:
         else:
             self.filename = []
 
-        if isinstance(dataframe, pd.DataFrame):
+        if isinstance(data, Spectrum):
+            self.data = [data]
+        elif isinstance(data, list):
+            self.data = data
+        elif isinstance(dataframe, pd.DataFrame):
             self.dataframe = [dataframe]
         elif isinstance(dataframe, list) and isinstance(dataframe[0], pd.DataFrame):
             self.dataframe = dataframe
+        elif lazy:
+            self.data = [Spectrum.lazy(file, cache, xrange, chunksize, self.dtype) for file in self.filename]
+        elif workers == 1 or len(self.filename) < 2:
+            data = []
+            for file in self.filename:
+                start = time.perf_counter()
+                data.append(self._read_dataframe(file, cache, xrange, chunksize))
+                self._seconds.append(time.perf_counter() - start)
+            self.data = data
         else:
-            self.dataframe = [self._read_dataframe(file) for file in self.filename]
+            results, self.failed = files.read_many(self.filename, workers, processes, cache, xrange, chunksize)
+            for file, error in self.failed.items():
+                log.warning(f'Skipping {file}  ->  {error}')
+            results = [result for result in results if result is not None]
+            self.filename = [file for file in self.filename if file not in self.failed]
+            self.data = [Spectrum.from_array(columns, data, dtype=self.dtype) for columns, data, _ in results]
+            self._seconds = [seconds for _, _, seconds in results]
         return self
 
-    def _read_dataframe(self, filename):
-        '''Read the dataframes from the files.'''
-        root = os.getcwd()
-        file = os.path.join(root, filename)
-        df = pd.read_csv(file, comment='#')
-        df = df.sort_values(by=df.columns[0]) # Sort the data by energy
+    def _read_dataframe(self, filename, cache=False, xrange:list=None, chunksize:int=None):
+        '''Read the data from the files.'''
+        return Spectrum.from_array(*files.read(filename, cache, xrange, chunksize), dtype=self.dtype)
+
+    @property
+    def data(self) -> list:
+        '''
+        List containing the `Spectrum` arrays with the spectral data.
+        Loaded automatically from the filenames at initialization.
+        '''
+        if self._dataframe is not None:
+            # The dataframes handed out so far are stale once the data can be changed
+            self._read_back()
+            self._dataframe = None
+            self._snapshot = []
+        return self._data
+
+    @data.setter
+    def data(self, data:list):
+        self._data = data
+        self._dataframe = None
+        self._snapshot = []
+
+    @property
+    def dataframe(self) -> list:
+        '''
+        List containing pandas dataframes with the spectral data.
+        The dataframes are built from `Spectra.data` when they are accessed,
+        and any change made to them is read back into `Spectra.data` the next time that it is accessed, keeping the units of each dataset.
+        Accessing `Spectra.data`, directly or through methods such as `Spectra.set_units()`, discards the dataframes handed out until then,
+        so access `Spectra.dataframe` again to get the updated data.
+        '''
+        if self._dataframe is None:
+            self._dataframe = [spectrum.dataframe() for spectrum in self._data]
+            self._snapshot = [_snapshot(df) for df in self._dataframe]
+        return self._dataframe
+
+    @dataframe.setter
+    def dataframe(self, dataframe:list):
+        self._dataframe = dataframe
+        self._snapshot = []
+
+    def _read_back(self) -> None:
+        '''
+        Rebuild the datasets whose dataframes, handed out by `Spectra.dataframe`, were changed since they were built.
+        Unchanged dataframes keep their `Spectrum`.
+        '''
+        data = list(self._data[:len(self._dataframe)])
+        for i, df in enumerate(self._dataframe):
+            if i < len(self._snapshot) and i < len(data) and _unchanged(df, self._snapshot[i]):
+                continue
+            spectrum = Spectrum.from_dataframe(df, self.dtype)
+            if i < len(data):
+                spectrum.unit = data[i].unit
+                data[i] = spectrum
+            else:
+                data.append(spectrum)
+            if spectrum.unit is None:
+                spectrum.unit = self._unit(i)
+        self._data = data
+
+    def _unit(self, i:int):
+        '''Standard target units of the dataset `i`, from `Spectra.units`, or `None` if unknown.'''
+        unit = self.units[i] if isinstance(self.units, list) and i < len(self.units) else self.units
+        if unit is None or isinstance(unit, list):
+            return None
+        return energy_units.standard(unit)
+
+    @property
+    def report(self) -> pd.DataFrame:
+        '''
+        Load report, as a pandas dataframe with one row per file, and the following columns:
+        `filename`, number of `rows`, names of the `columns`, `seconds` spent reading the file,
+        input units `units_in`, target `units`, and the `error` of the files listed in `Spectra.failed`.
+        Files that are not read yet in lazy mode have no rows nor columns,
+        and the reading time is only measured when loading the files at initialization.
+        '''
+        report = []
+        data = self._data if self._dataframe is None else self._dataframe
+        for i, spectrum in enumerate(data):
+            if isinstance(spectrum, Spectrum) and not spectrum.loaded:
+                rows = None
+                columns = None
+            else:  # Spectrum or dataframe
+                rows = len(spectrum)
+                columns = list(spectrum.columns)
+            report.append({
+                'filename': self.filename[i] if i < len(self.filename) else None,
+                'rows': rows,
+                'columns': columns,
+                'seconds': self._seconds[i] if i < len(self._seconds) else None,
+                'units_in': self.units_in[i] if isinstance(self.units_in, list) and i < len(self.units_in) else self.units_in,
+                'units': self.units[i] if isinstance(self.units, list) and i < len(self.units) else self.units,
+                'error': None,
+            })
+        for file, error in self.failed.items():
+            report.append({'filename': file, 'rows': None, 'columns': None, 'seconds': None, 'units_in': None, 'units': None, 'error': error})
+        return pd.DataFrame(report, columns=['filename', 'rows', 'columns', 'seconds', 'units_in', 'units', 'error'])
 
-        print(f'\nNew dataframe from {file}')
-        print(df.head(),'\n')
-        return df
+    def _skip_failed(self, values, filename):
+        '''Remove the values of the files listed in `Spectra.failed`, from a list with one value per file.'''
+        if not isinstance(values, list) or not isinstance(filename, list) or len(values) != len(filename):
+            return values
+        return [value for value, file in zip(values, filename) if file not in self.failed]
 
     def set_units(
             self,
             units,
             units_in=None,
             default_unit='cm-1',
+            laser:float=None,
             ):
         '''
         Method to change between spectral units. ALWAYS use this method to do that.
@@ -332,13 +1252,14 @@ class Spectra:
         # Spectra.set_units(desired_units, units_input)
         Spectra.set_units('meV', 'cm-1')
         ```
+        The energy units `'meV'`, `'eV'`, `'cm-1'`, `'THz'`, `'K'`, `'J'` and `'Ry'`,
+        and the wavelength in `'nm'` are supported; see `maatpy.units` for details.
+        Linear conversions are not applied right away, but folded into a pending factor; see `Spectrum.scale_x()`.
+        For Raman spectra, the wavelength of the `laser` in nm can be set to convert between Raman shifts and absolute wavelengths.
         '''
-        mev = 'meV'
-        cm = 'cm-1'
-        unit_format={
-                mev: alias.unit['meV'],
-                cm: alias.unit['cm-1'] + alias.unit['cm'],
-            }
+        standard = energy_units.standard
+        # Datasets passed as `data`, without filenames, also have their units
+        count = len(self.filename) if self.filename else len(self._data)
         if self.units is not None:
             units_in = deepcopy(self.units)
             self.units = units
@@ -349,74 +1270,119 @@ class Spectra:
             units_in = None
             self.units = default_unit
         elif units is None and units_in is not None:
-            units_in = None
             self.units = deepcopy(units_in)
+            units_in = None
         if isinstance(units_in, list):
-            for i, unit_in in enumerate(units_in):
-                for key, value in unit_format.items():
-                    if unit_in in value:
-                        units_in[i] = key
-                        break
+            units_in = [standard(unit_in) for unit_in in units_in]
             if len(units_in) == 1:
-                units_in = units_in * len(self.filename)
-            elif len(units_in) != len(self.filename):
+                units_in = units_in * count
+            elif len(units_in) != count:
                 raise ValueError("units_in must be a list of the same length as filenames.")
         if isinstance(units_in, str):
-            for key, value in unit_format.items():
-                if units_in in value:
-                    units_in = key
-                    break
-            units_in = [units_in] * len(self.filename)
+            units_in = [standard(units_in)] * count
         if isinstance(self.units, list):
-            for i, unit in enumerate(self.units):
-                for key, value in unit_format.items():
-                    if unit in value:
-                        self.units[i] = key
-                        break
+            self.units = [standard(unit) for unit in self.units]
             if len(self.units) == 1:
-                self.units = self.units * len(self.filename)
-            elif len(self.units) != len(self.filename):
+                self.units = self.units * count
+            elif len(self.units) != count:
                 raise ValueError("units_in must be a list of the same length as filenames.")
         if isinstance(self.units, str):
-            for key, value in unit_format.items():
-                if self.units in value:
-                    self.units = key
-                    break
-            self.units = [self.units] * len(self.filename)
+            self.units = [standard(self.units)] * count
+        if self.units_in is None:
+            self.units_in = deepcopy(self.units) if units_in is None else deepcopy(units_in)
         if units_in is None:
+            for spectrum, unit in zip(self.data, self.units):
+                spectrum.unit = unit
             return self
         # Otherwise, convert the dataframes
         if len(self.units) != len(units_in):
             raise ValueError("Units len mismatching.")
         for i, unit in enumerate(self.units):
-            if unit == units_in[i]:
-                continue
-            if unit == mev and units_in[i] == cm:
-                self.dataframe[i][self.dataframe[i].columns[0]] = self.dataframe[i][self.dataframe[i].columns[0]] * cm_to_meV
-            elif unit == cm and units_in[i] == mev:
-                self.dataframe[i][self.dataframe[i].columns[0]] = self.dataframe[i][self.dataframe[i].columns[0]] * meV_to_cm
-            else:
-                raise ValueError(f"Unit conversion error between '{unit}' and '{units_in[i]}'")
-        # Rename dataframe columns
-        E_units = None
-        for i, df in enumerate(self.dataframe):
-            if self.units[i] == mev:
-                E_units = 'meV'
-            elif self.units[i] == cm:
-                E_units = 'cm-1'
-            else:
-                E_units = self.units[i]
-            if self.type == 'INS':
-                if self.dataframe[i].shape[1] == 3:
-                    self.dataframe[i].columns = [f'Energy transfer / {E_units}', 'S(Q,E)', 'Error']
+            spectrum = self.data[i]
+            if unit != units_in[i]:
+                if energy_units.is_linear(units_in[i], unit):
+                    spectrum.scale_x(energy_units.factor(units_in[i], unit))
                 else:
-                    self.dataframe[i].columns = [f'Energy transfer / {E_units}', 'S(Q,E)']
+                    spectrum.map_x(lambda x, unit_in=units_in[i], unit=unit: energy_units.convert(x, unit_in, unit, laser))
+            spectrum.unit = unit
+        return self._set_columns()
+
+    def _set_columns(self):
+        '''Rename the columns of the datasets after their units and the type of the spectra.'''
+        for i, spectrum in enumerate(self.data):
+            E_units = self.units[i]
+            if E_units == 'nm':
+                spectrum.set_columns([f'Wavelength / {E_units}'] + spectrum.columns[1:])
+            elif self.type == 'INS':
+                spectrum.set_columns([f'Energy transfer / {E_units}', 'S(Q,E)', 'Error'])
             elif self.type == 'ATR':
-                self.dataframe[i].columns = [f'Wavenumber / {E_units}', 'Absorbance']
+                spectrum.set_columns([f'Wavenumber / {E_units}', 'Absorbance', 'Error'])
             elif self.type == 'RAMAN':
-                self.dataframe[i].columns = [f'Raman shift / {E_units}', 'Counts']
+                spectrum.set_columns([f'Raman shift / {E_units}', 'Counts', 'Error'])
         return self
 
+    def view(self):
+        '''
+        Copy-on-write copy of the `Spectra` object, used by the analysis functions instead of a deep copy.
+        The datasets are views from `Spectrum.view()`, so no data is copied until new arrays are assigned to them;
+        only the small attributes, such as the lists of units, `Spectra.plotting` and `Spectra.scale_range`, are copied.
+        '''
+        view = copy(self)
+        view.data = [spectrum.view() for spectrum in self.data]
+        view.filename = list(self.filename)
+        view.units = deepcopy(self.units)
+        view.units_in = deepcopy(self.units_in)
+        view.plotting = deepcopy(self.plotting)
+        view.scale_range = deepcopy(self.scale_range)
+        view.failed = dict(self.failed)
+        view._seconds = list(self._seconds)
+        return view
+
+    def grids(self) -> list:
+        '''
+        Group the datasets that share the same x-grid, so that they can be processed together as a 2D array.
+        Returns a list with a tuple for each group, with the list of indices of the datasets and their common `x` array.
+        Datasets with unique grids are returned in groups of one.
+        '''
+        groups = []
+        candidates = {}
+        for i, spectrum in enumerate(self.data):
+            x = spectrum.x
+            key = (len(x), x[0], x[-1]) if len(x) else (0,)
+            for indices, grid in candidates.get(key, []):
+                if grid is x or np.array_equal(grid, x):
+                    indices.append(i)
+                    break
+            else:
+                group = ([i], x)
+                candidates.setdefault(key, []).append(group)
+                groups.append(group)
+        return groups
+
+    def to_units(
+            self,
+            units,
+            laser:float=None,
+        ):
+        '''
+        View of the `Spectra` object with the horizontal axis in other `units`, e.g. for an analysis that needs meV,
+        without changing the original object. The `units` can be a single unit, or a list with one unit per dataset.
+        For linear conversions no data is copied: each dataset is a view from `Spectrum.to_units()`,
+        and the rest of attributes, such as `Spectra.plotting`, are shared with the original object.
+        Datasets with unknown `Spectrum.unit` are taken to be in the `Spectra.units` of this object.
+        '''
+        if not isinstance(units, list):
+            units = [units] * len(self.data)
+        data = []
+        for i, (spectrum, unit) in enumerate(zip(self.data, units)):
+            if spectrum.unit is None:  # Datasets without units are taken as in Spectra.units
+                spectrum = Spectrum._view(spectrum._x, spectrum.y, spectrum.error, spectrum.columns, self._unit(i), spectrum._scale)
+            data.append(spectrum.to_units(unit, laser))
+        view = copy(self)
+        view.data = data
+        view.units = [energy_units.standard(unit) for unit in units]
+        return view._set_columns()
+
 
 class Material:
     '''
@@ -31,7 +31,7 @@ version = 'v3.1.0'
 
 '''---
 ## Energy conversion factors
-Note that `cm` refers to cm$^{-1}$.
+Note that `cm` refers to cm$^{-1}$, and `K` to the thermal energy $k_B T$ at a temperature in kelvin.
 '''
 eV_to_meV   = 1000.0
 meV_to_eV   = 0.001
@@ -45,6 +45,10 @@ Ry_to_eV    = 13.605693122990
 eV_to_Ry    = 1.0 / Ry_to_eV
 Ry_to_J     = 2.1798723611030e-18
 J_to_Ry     = 1.0 / Ry_to_J
+THz_to_meV  = 4.135667696923859
+meV_to_THz  = 1.0 / THz_to_meV
+K_to_meV    = 0.08617333262145179
+meV_to_K    = 1.0 / K_to_meV
 cal_to_J    = 4.184
 J_to_cal    = 1 / cal_to_J
 kcal_to_J   = cal_to_J * 1000.0
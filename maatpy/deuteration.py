@@ -10,10 +10,10 @@ This module contains different methods to calculate deuteration levels from spec
 '''
 
 
-from . import alias
+from . import log
 from .constants import *
 from .classes import *
-from .fit import area_under_peak, ratio_areas, plateau
+from .fit import areas_under_peaks, ratio_areas, plateau, plateau_onset
 from copy import deepcopy
 
 
@@ -31,6 +31,8 @@ def impulse_approx(
 
     Protonated and deuterated materials must be specified as `maatpy.classes.Material` objects.
     The threshold controls the start of the plateau (in meV) to consider Deep Inelastic Neutron Scattering (DINS).
+    Set `threshold=None` to find it automatically with `maatpy.fit.plateau_onset()`,
+    taking the latest onset of both datasets.
     The protonated and deuterated dataframe indexes are specified by `H_df_index` and `D_df_index`, respectively.
 
     In this approximation, the ideal ratio between the cross-sections and the experimental ratio between the pleteaus at high energies should be the same:
@@ -45,7 +47,6 @@ def impulse_approx(
     > [!WARNING]
     > This approximation is very sensitive to the mass sample, specified by `maatpy.classes.Material.grams`.
     '''
-    ins = deepcopy(ins)
     material_H = deepcopy(material_H)
     material_D = deepcopy(material_D)
     material_H_grams = 1.0 if material_H.grams is None else material_H.grams
@@ -55,17 +56,16 @@ def impulse_approx(
     material_D.grams = material_D_grams
     material_D.set()
 
-    material_H.print()
-    material_D.print()
+    if log.enabled():
+        material_H.print()
+        material_D.print()
 
-    # Make sure units are in meV
-    units_in = ins.units
-    if units_in not in alias.unit['meV']:
-        ins.set_units('meV', units_in)
+    # Make sure units are in meV, without copying the data
+    ins = ins.to_units('meV')
 
-    # Divide the y values of the dataframes by the mols of the material.
-    ins.dataframe[H_df_index][ins.dataframe[H_df_index].columns[1]] = ins.dataframe[H_df_index][ins.dataframe[H_df_index].columns[1]]
-    ins.dataframe[D_df_index][ins.dataframe[D_df_index].columns[1]] = ins.dataframe[D_df_index][ins.dataframe[D_df_index].columns[1]]
+    if threshold is None:
+        threshold = max(plateau_onset(ins, H_df_index), plateau_onset(ins, D_df_index))
+        log.info(f'Plateau onset:             {threshold:.2f} meV')
 
     plateau_H, plateau_H_error = plateau(ins, [threshold, None], H_df_index)
     plateau_D, plateau_D_error = plateau(ins, [threshold, None], D_df_index)
@@ -84,12 +84,12 @@ def impulse_approx(
     deuteration = (1 - ratio) / (1 - ratio_ideal)
     deuteration_error = abs(deuteration * np.sqrt((ratio_error / ratio)**2))
 
-    print(f'Normalized plateau H:      {plateau_H_normalized} +- {plateau_H_normalized_error}')
-    print(f'Normalized plateau D:      {plateau_D_normalized} +- {plateau_D_normalized_error}')
-    print(f'Ratio D/H plateaus:        {ratio} +- {ratio_error}')
-    print(f'Ratio D/H cross sections:  {ratio_ideal}')
+    log.info(f'Normalized plateau H:      {plateau_H_normalized} +- {plateau_H_normalized_error}')
+    log.info(f'Normalized plateau D:      {plateau_D_normalized} +- {plateau_D_normalized_error}')
+    log.info(f'Ratio D/H plateaus:        {ratio} +- {ratio_error}')
+    log.info(f'Ratio D/H cross sections:  {ratio_ideal}')
 
-    print(f"\nDeuteration: {deuteration:.2f} +- {deuteration_error:.2f}\n")
+    log.info(f"\nDeuteration: {deuteration:.2f} +- {deuteration_error:.2f}\n")
     return round(deuteration,2), round(deuteration_error,2)
 
 
@@ -120,8 +120,6 @@ def peaks_mapi(
     If some peak is not present in your sample, just set the limits to a small baseline plateau.
     '''
 
-    peak_data = deepcopy(ins)
-
     baseline = 0.0
     baseline_error = 0.0
     if 'baseline' in peaks:
@@ -165,10 +163,13 @@ def peaks_mapi(
     if not run_partial:
         raise ValueError('No peaks to integrate. Remember to assign peak limits as a dictionary with the keys: h6d0, h5d1, h4d2, h3d3, h2d4, h1d5, h0d6.')
 
-    h6d0_area, h6d0_area_error = area_under_peak(peak_data, [h6d0_limits[0], h6d0_limits[1], baseline, baseline_error], df_index, True)
-    h5d1_area, h5d1_area_error = area_under_peak(peak_data, [h5d1_limits[0], h5d1_limits[1], baseline, baseline_error], df_index, True)
-    h4d2_area, h4d2_area_error = area_under_peak(peak_data, [h4d2_limits[0], h4d2_limits[1], baseline, baseline_error], df_index, True)
-    h3d3_area, h3d3_area_error = area_under_peak(peak_data, [h3d3_limits[0], h3d3_limits[1], baseline, baseline_error], df_index, True)
+    # All the peaks are integrated at once
+    limits = [h6d0_limits, h5d1_limits, h4d2_limits, h3d3_limits]
+    if run_total:
+        limits += [h2d4_limits, h1d5_limits, h0d6_limits]
+    areas, area_errors = areas_under_peaks(ins, [[limit[0], limit[1], baseline, baseline_error] for limit in limits], df_index, True)
+    h6d0_area, h5d1_area, h4d2_area, h3d3_area = areas[:4]
+    h6d0_area_error, h5d1_area_error, h4d2_area_error, h3d3_area_error = area_errors[:4]
     h6d0_area /= 6
     h5d1_area /= 5
     h4d2_area /= 4
@@ -194,9 +195,8 @@ def peaks_mapi(
         protonation_error = np.sqrt((1 * h6d0_error)**2 + (2/3 * h5d1_error)**2 + (1/3 * h4d2_error)**2)
 
     if run_total:
-        h2d4_area, h2d4_area_error = area_under_peak(peak_data, [h2d4_limits[0], h2d4_limits[1], baseline, baseline_error], df_index, True)
-        h1d5_area, h1d5_area_error = area_under_peak(peak_data, [h1d5_limits[0], h1d5_limits[1], baseline, baseline_error], df_index, True)
-        h0d6_area, h0d6_area_error = area_under_peak(peak_data, [h0d6_limits[0], h0d6_limits[1], baseline, baseline_error], df_index, True)
+        h2d4_area, h1d5_area, h0d6_area = areas[4:]
+        h2d4_area_error, h1d5_area_error, h0d6_area_error = area_errors[4:]
         h2d4_area /= 2
         h1d5_area /= 1
         h0d6_area /= 1
@@ -228,33 +228,33 @@ def peaks_mapi(
         protonation_CDND_amine_error = np.sqrt((1 * h3d3_error_CDND)**2 + (2/3 * h2d4_error_CDND)**2 + (1/3 * h1d5_error_CDND)**2)
 
 
-    print()
+    log.info('')
     if hasattr(ins, "plotting") and ins.plotting.legend != None:
-        print(f'Sample:  {ins.plotting.legend[df_index]}')
+        log.info(f'Sample:  {ins.plotting.legend[df_index]}')
     else:
-        print(f'Sample:  {ins.filename[df_index]}')
-    print(f'Corrected baseline: {round(baseline,2)} +- {round(baseline_error,2)}')
+        log.info(f'Sample:  {ins.filename[df_index]}')
+    log.info(f'Corrected baseline: {round(baseline,2)} +- {round(baseline_error,2)}')
     if not run_total:
-        print(f"HHH {h6d0_limits}:  {round(h6d0_ratio,2)}  +-  {round(h6d0_error,2)}")
-        print(f"DHH {h5d1_limits}:  {round(h5d1_ratio,2)}  +-  {round(h5d1_error,2)}")
-        print(f"DDH {h4d2_limits}:  {round(h4d2_ratio,2)}  +-  {round(h4d2_error,2)}")
-        print(f"DDD {h3d3_limits}:  {round(h3d3_ratio,2)}  +-  {round(h3d3_error,2)}")
-        print(f"Amine deuteration:  {round(deuteration,2)}  +-  {round(deuteration_error,2)}")
-        print(f"Amine protonation:  {round(protonation,2)}  +-  {round(protonation_error,2)}")
-        print()
+        log.info(f"HHH {h6d0_limits}:  {round(h6d0_ratio,2)}  +-  {round(h6d0_error,2)}")
+        log.info(f"DHH {h5d1_limits}:  {round(h5d1_ratio,2)}  +-  {round(h5d1_error,2)}")
+        log.info(f"DDH {h4d2_limits}:  {round(h4d2_ratio,2)}  +-  {round(h4d2_error,2)}")
+        log.info(f"DDD {h3d3_limits}:  {round(h3d3_ratio,2)}  +-  {round(h3d3_error,2)}")
+        log.info(f"Amine deuteration:  {round(deuteration,2)}  +-  {round(deuteration_error,2)}")
+        log.info(f"Amine protonation:  {round(protonation,2)}  +-  {round(protonation_error,2)}")
+        log.info('')
         return f"{deuteration:.2f} +- {deuteration_error:.2f}"
     else:
-        print(f"HHH-HHH {h6d0_limits}:  {round(h6d0_ratio_CDND,2)}  +-  {round(h6d0_error_CDND,2)}")
-        print(f"DHH-HHH {h5d1_limits}:  {round(h5d1_ratio_CDND,2)}  +-  {round(h5d1_error_CDND,2)}")
-        print(f"DDH-HHH {h4d2_limits}:  {round(h4d2_ratio_CDND,2)}  +-  {round(h4d2_error_CDND,2)}")
-        print(f"DDD-HHH {h3d3_limits}:  {round(h3d3_ratio_CDND,2)}  +-  {round(h3d3_error_CDND,2)}")
-        print(f"DDD-DHH {h2d4_limits}:  {round(h2d4_ratio_CDND,2)}  +-  {round(h2d4_error_CDND,2)}")
-        print(f"DDD-DDH {h1d5_limits}:  {round(h1d5_ratio_CDND,2)}  +-  {round(h1d5_error_CDND,2)}")
-        print(f"DDD-DDD {h0d6_limits}:  {round(h0d6_ratio_CDND,2)}  +-  {round(h0d6_error_CDND,2)}")
-        print(f"Total deuteration:  {round(deuteration_CDND,2)}  +-  {round(deuteration_CDND_error,2)}")
-        print(f"Total protonation:  {round(protonation_CDND,2)}  +-  {round(protonation_CDND_error,2)}")
-        print(f"Amine deuteration:  {round(deuteration_CDND_amine,2)}  +-  {round(deuteration_CDND_amine_error,2)}")
-        print(f"Amine protonation:  {round(protonation_CDND_amine,2)}  +-  {round(protonation_CDND_amine_error,2)}")
-        print()
+        log.info(f"HHH-HHH {h6d0_limits}:  {round(h6d0_ratio_CDND,2)}  +-  {round(h6d0_error_CDND,2)}")
+        log.info(f"DHH-HHH {h5d1_limits}:  {round(h5d1_ratio_CDND,2)}  +-  {round(h5d1_error_CDND,2)}")
+        log.info(f"DDH-HHH {h4d2_limits}:  {round(h4d2_ratio_CDND,2)}  +-  {round(h4d2_error_CDND,2)}")
+        log.info(f"DDD-HHH {h3d3_limits}:  {round(h3d3_ratio_CDND,2)}  +-  {round(h3d3_error_CDND,2)}")
+        log.info(f"DDD-DHH {h2d4_limits}:  {round(h2d4_ratio_CDND,2)}  +-  {round(h2d4_error_CDND,2)}")
+        log.info(f"DDD-DDH {h1d5_limits}:  {round(h1d5_ratio_CDND,2)}  +-  {round(h1d5_error_CDND,2)}")
+        log.info(f"DDD-DDD {h0d6_limits}:  {round(h0d6_ratio_CDND,2)}  +-  {round(h0d6_error_CDND,2)}")
+        log.info(f"Total deuteration:  {round(deuteration_CDND,2)}  +-  {round(deuteration_CDND_error,2)}")
+        log.info(f"Total protonation:  {round(protonation_CDND,2)}  +-  {round(protonation_CDND_error,2)}")
+        log.info(f"Amine deuteration:  {round(deuteration_CDND_amine,2)}  +-  {round(deuteration_CDND_amine_error,2)}")
+        log.info(f"Amine protonation:  {round(protonation_CDND_amine,2)}  +-  {round(protonation_CDND_amine_error,2)}")
+        log.info('')
         return f"{deuteration_CDND_amine:.2f} +- {deuteration_CDND_amine_error:.2f} / {deuteration_CDND:.2f} +- {deuteration_CDND_error:.2f}"
 
@@ -0,0 +1,710 @@
+'''
+# Description
+This module contains functions to read spectral data files.
+These are used by `maatpy.classes.Spectra` to load the data at initialization,
+but can also be called directly.
+
+# Index
+- `read()`
+- `read_csv()`
+- `read_mantid()`
+- `is_mantid()`
+- `is_compressed()`
+- `read_nexus()`
+- `nexus_unit()`
+- `is_nexus()`
+- `write_parquet()`
+- `read_parquet()`
+- `read_many()`
+- `index()`
+
+---
+'''
+
+
+import os
+import re
+import glob
+import time
+import json
+import gzip
+import lzma
+import bz2
+import collections
+import contextlib
+import warnings
+import numpy as np
+import pandas as pd
+from . import cache as sidecar
+from . import store
+from . import log
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+def read(
+        filename:str,
+        cache=False,
+        xrange:list=None,
+        chunksize:int=None,
+    ) -> tuple:
+    '''
+    Read a CSV file with spectral data, sorted by the first column.
+    Returns a tuple with the column names, and a float array with one row per column.
+    Relative paths are read from the current working directory.
+    Lines starting by `#` are ignored.
+    CSV files written by MANTID are detected automatically and read with the faster `read_mantid()`.
+    Compressed files, such as `.csv.gz`, `.csv.xz` or `.csv.bz2`, are decompressed on the fly
+    while parsing, without writing any temporary file; see `maatpy.files.compressions`.
+    NeXus/HDF5 files, with the extensions listed in `maatpy.files.nexus_extensions`,
+    are read with `read_nexus()`, keeping only the first spectrum of the workspace.
+
+    If `cache=True`, the parsed data is stored in a binary sidecar cache, see `maatpy.cache`,
+    and memory-mapped from there the next time that the unchanged file is read.
+    A custom cache folder can be used by setting `cache` to its path.
+    For compressed files, this means that the file is only decompressed and parsed once.
+
+    To keep only the rows inside a given range of the first column, set `xrange=[xmin, xmax]`,
+    in the same units as the file. Any of the limits can be `None`.
+    The file is then streamed in chunks of `chunksize` rows, defaulting to `maatpy.files.chunk_rows`,
+    keeping only the rows inside the range, so that the memory usage scales with the kept window
+    instead of the file size. If the data is sorted, the reading stops once the range is exceeded.
+    When the cache is also enabled, the whole file is cached instead,
+    and the range is cropped from the memory-mapped data.
+    NeXus files are never cached, since they are already read directly from their binary datasets.
+
+    If `maatpy.store.enabled = True`, files with the same content are only parsed once per process,
+    and their data is shared as a read-only array; see `maatpy.store` for details. Reads with `xrange` and NeXus files are not shared.
+    '''
+    root = os.getcwd()
+    file = os.path.join(root, filename)
+    # Partial reads of a window or of NeXus files are not shared
+    key = store.key(file) if store.enabled and xrange is None and not is_nexus(file) else None
+    shared = store.get(key) if key is not None else None
+    if shared is not None:
+        columns, data = shared
+    else:
+        columns, data = _parse(file, cache, xrange, chunksize)
+        if key is not None:
+            columns, data = store.put(key, columns, data)
+    if log.enabled():
+        log.info(f'\nNew data from {file}')
+        log.info(f'{_dataframe(columns, data[:, :5])}\n')
+    return columns, data
+
+
+def _parse(
+        file:str,
+        cache=False,
+        xrange:list=None,
+        chunksize:int=None,
+    ) -> tuple:
+    '''Parse a file as described in `read()`, without sharing the data.'''
+    cached = sidecar.load(file, cache) if cache and not is_nexus(file) else None
+    # The header is only read once, to detect MANTID files and to skip it when parsing them
+    header = _mantid_header(file) if cached is None and not is_nexus(file) else None
+    if is_nexus(file):
+        columns, data = read_nexus(file, 0, xrange)[0]
+    elif cached is not None:
+        columns, data = cached
+        data = _crop(data, xrange)
+    elif cache or (xrange is None and chunksize is None):
+        if header is not None:
+            columns, data = _read_mantid(file, header)
+        else:
+            df = pd.read_csv(file, comment='#')
+            columns = list(df.columns)
+            data = _sort(df.to_numpy(dtype=float).T)
+        if cache:
+            sidecar.save(file, columns, data, cache)
+        data = _crop(data, xrange)
+    elif header is not None:
+        columns, data = _read_mantid(file, header, xrange, chunksize)
+    else:
+        df = _read_chunks(file, xrange, chunksize)
+        columns = list(df.columns)
+        data = _sort(df.to_numpy(dtype=float).T)
+    return columns, data
+
+
+def read_csv(
+        filename:str,
+        cache=False,
+        xrange:list=None,
+        chunksize:int=None,
+    ) -> pd.DataFrame:
+    '''
+    Read a CSV file with spectral data as a pandas dataframe, sorted by the first column.
+    Takes the same options as `read()`.
+    '''
+    return _dataframe(*read(filename, cache, xrange, chunksize))
+
+
+chunk_rows = 100000
+'''Default number of rows per chunk, when streaming files with `read(xrange=[xmin, xmax])`.'''
+
+
+def _read_chunks(
+        filename:str,
+        xrange:list=None,
+        chunksize:int=None,
+    ) -> pd.DataFrame:
+    '''Read a CSV file with pandas in chunks, keeping only the rows inside `xrange`. The rows are not sorted.'''
+    chunksize = chunk_rows if chunksize is None else chunksize
+    kept = []
+    ascending = True
+    last = None
+    with pd.read_csv(filename, comment='#', chunksize=chunksize) as reader:
+        for chunk in reader:
+            x = chunk[chunk.columns[0]].to_numpy()
+            kept.append(chunk[_mask(x, xrange)])
+            if _range_exceeded(x, xrange, last, ascending):
+                break
+            ascending = ascending and _is_sorted(x) and (last is None or x.size == 0 or x[0] >= last)
+            last = x[-1] if x.size else last
+    return pd.concat(kept)
+
+
+def _dataframe(columns:list, data) -> pd.DataFrame:
+    '''Build a dataframe from the column names and an array with one row per column.'''
+    return pd.DataFrame({column: values for column, values in zip(columns, data)})
+
+
+def _mask(x, xrange:list=None):
+    '''Boolean mask of the values of `x` inside `xrange=[xmin, xmax]`.'''
+    mask = np.ones(len(x), dtype=bool)
+    if xrange is None:
+        return mask
+    if xrange[0] is not None:
+        mask &= x >= xrange[0]
+    if len(xrange) > 1 and xrange[1] is not None:
+        mask &= x <= xrange[1]
+    return mask
+
+
+def _crop(data, xrange:list=None):
+    '''Crop an array with one row per column, keeping the columns where the first row is inside `xrange`.'''
+    if xrange is None:
+        return data
+    return data[:, _mask(data[0], xrange)]
+
+
+def _sort(data):
+    '''
+    Sort an array with one row per column by its first row, the energy, returning a contiguous array.
+    Data that is already in ascending order is kept as it is, and data in descending order is just reversed.
+    '''
+    x = data[0]
+    if _is_sorted(x):
+        return np.ascontiguousarray(data)
+    if np.all(x[1:] <= x[:-1]):
+        return np.ascontiguousarray(data[:, ::-1])
+    return np.ascontiguousarray(data[:, np.argsort(x, kind='stable')])
+
+
+def _is_sorted(x) -> bool:
+    '''Check whether an array is sorted in ascending order.'''
+    return x.size < 2 or bool(np.all(x[1:] >= x[:-1]))
+
+
+def _range_exceeded(x, xrange:list, last, ascending:bool) -> bool:
+    '''Check whether a chunk of sorted data goes beyond the top limit of `xrange`, so that no more chunks are needed.'''
+    if xrange is None or len(xrange) < 2 or xrange[1] is None or x.size == 0:
+        return False
+    if not ascending or not _is_sorted(x) or (last is not None and x[0] < last):
+        return False
+    return x[-1] > xrange[1]
+
+
+mantid_header = re.compile(r'^#\s*X\s*,\s*Y\s*(,\s*E)?\b')
+'''Regular expression matching the header of the CSV files written by MANTID, as in `# X , Y , E Distribution=false`.'''
+
+
+def is_mantid(filename:str) -> bool:
+    '''Check whether a CSV file was written by MANTID, with an `X , Y` or `X , Y , E` header.'''
+    return _mantid_columns(filename) is not None
+
+
+pyarrow_bytes = 1_000_000
+'''Minimum size of the MANTID files parsed with pandas, in bytes. Smaller files are parsed faster with NumPy.'''
+
+
+def read_mantid(
+        filename:str,
+        xrange:list=None,
+        chunksize:int=None,
+    ) -> tuple:
+    '''
+    Read a CSV file written by MANTID, with two or three columns as `X , Y` or `X , Y , E`.
+    The numbers are parsed in bulk with the multithreaded pyarrow engine of pandas when pyarrow is installed,
+    skipping the header and blank lines. The C engine of pandas is used instead if pyarrow is not available,
+    or if the file has other comments after the header.
+    Files smaller than `maatpy.files.pyarrow_bytes` are parsed with NumPy, which has less overhead for a few thousand rows.
+    Returns a tuple with the column names from the header, and an array with one row per column, sorted by `X`.
+    An optional `xrange` and `chunksize` can be used to stream the file as in `read()`.
+
+    Parsing the numbers takes most of the time, so the gain is moderate: in `examples/benchmark_read.py`,
+    files from 100k rows up are read about 1.7 to 2 times faster than with the default `pd.read_csv()` and sorting,
+    while files of a few thousand rows are read about as fast as with `np.loadtxt()`.
+    '''
+    header = _mantid_header(filename)
+    if header is None:
+        raise ValueError(f"read_mantid: {filename} does not have a MANTID header as '# X , Y , E'")
+    return _read_mantid(filename, header, xrange, chunksize)
+
+
+def _read_mantid(
+        filename:str,
+        header:tuple,
+        xrange:list=None,
+        chunksize:int=None,
+    ) -> tuple:
+    '''Read a MANTID file as in `read_mantid()`, with the column names and header lines from `_mantid_header()`.'''
+    columns, header_lines = header
+    options = {'header': None, 'usecols': range(len(columns)), 'dtype': float}
+    if xrange is None and chunksize is None:
+        if os.path.getsize(filename) < pyarrow_bytes:
+            # Uncompressed files are read by name, which NumPy parses faster than a file object
+            with (_open(filename) if is_compressed(filename) else contextlib.nullcontext(filename)) as f, warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)  # Files with only the header are empty
+                data = np.loadtxt(f, delimiter=',', comments='#', ndmin=2, usecols=range(len(columns))).T
+            return columns, _sort(data.reshape(len(columns), -1))
+        try:
+            df = pd.read_csv(filename, engine='pyarrow', skiprows=header_lines, **options)
+        except Exception:  # pyarrow is not installed, or there are other comments
+            df = _read_c(filename, None, options)
+        # Copy each column to its row, instead of transposing a row-major array
+        data = np.empty((len(columns), len(df)))
+        for i in range(len(columns)):
+            data[i] = df.iloc[:, i].to_numpy(dtype=float)
+    else:
+        chunksize = chunk_rows if chunksize is None else chunksize
+        kept = [np.empty((0, len(columns)))]
+        ascending = True
+        last = None
+        with _read_c(filename, chunksize, options) as chunks:
+            for df in chunks:
+                chunk = df.to_numpy(dtype=float)
+                x = chunk[:, 0]
+                kept.append(chunk[_mask(x, xrange)])
+                if _range_exceeded(x, xrange, last, ascending):
+                    break
+                ascending = ascending and _is_sorted(x) and (last is None or x.size == 0 or x[0] >= last)
+                last = x[-1] if x.size else last
+        data = np.concatenate(kept).T
+    return columns, _sort(data)
+
+
+def _read_c(filename:str, chunksize:int, options:dict):
+    '''Read the numbers of a MANTID file with the C engine of pandas, as a dataframe or as a reader of chunks.'''
+    try:
+        return pd.read_csv(filename, engine='c', comment='#', skip_blank_lines=True, chunksize=chunksize, **options)
+    except pd.errors.EmptyDataError:  # Only the header
+        df = pd.DataFrame(np.empty((0, len(options['usecols']))))
+        return df if chunksize is None else contextlib.nullcontext(iter([df]))
+
+
+def _mantid_columns(filename:str):
+    '''Get the column names from the MANTID header of a file, or `None` if there is no such header.'''
+    header = _mantid_header(filename)
+    return None if header is None else header[0]
+
+
+def _mantid_header(filename:str):
+    '''
+    Get the column names from the MANTID header of a file, and the number of lines up to the header,
+    or `None` if there is no such header.
+    '''
+    with _open(filename) as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            header = mantid_header.match(line)
+            if not header:
+                return None
+            return (['X', 'Y', 'E'] if header.group(1) else ['X', 'Y']), i + 1
+    return None
+
+
+nexus_extensions = ('.nxs', '.nx5', '.h5', '.hdf5')
+'''File extensions read as NeXus/HDF5 files by `read()`.'''
+
+nexus_units = {
+    'DeltaE': 'meV',
+    'Energy': 'meV',
+    'DeltaE_inWavenumber': 'cm-1',
+    'Energy_inWavenumber': 'cm-1',
+}
+'''Units of the x-axis of MANTID workspaces, as `{MANTID unit ID: MaatPy unit}`.'''
+
+
+def is_nexus(filename:str) -> bool:
+    '''Check whether a file is a NeXus/HDF5 file, from its extension.'''
+    return os.path.splitext(filename)[1].lower() in nexus_extensions
+
+
+compressions = {
+    '.gz': gzip,
+    '.xz': lzma,
+    '.bz2': bz2,
+}
+'''Modules used to decompress the files, by extension.'''
+
+
+def is_compressed(filename:str) -> bool:
+    '''Check whether a file is compressed, from its extension.'''
+    return os.path.splitext(filename)[1].lower() in compressions
+
+
+def _open(filename:str, mode:str='r'):
+    '''Open a file as text, or as bytes if `mode='rb'`, decompressing it on the fly if needed.'''
+    module = compressions.get(os.path.splitext(filename)[1].lower())
+    if module is None:
+        return open(filename, mode)
+    return module.open(filename, 'rt' if mode == 'r' else mode)
+
+
+def read_nexus(
+        filename:str,
+        indices=None,
+        xrange:list=None,
+        entry:str=None,
+    ) -> list:
+    '''
+    Read the spectra of a processed MANTID workspace saved as a NeXus/HDF5 file, as with `SaveNexusProcessed`.
+    Requires the optional `h5py` package.
+    Returns a list with a tuple for each spectrum, with the column names `['X', 'Y', 'E']`
+    and an array with one row per column, sorted by `X`.
+
+    Only the spectra listed in `indices` are read, which can be a single index or a list; all of them by default.
+    To keep only the points inside a given range of `X`, set `xrange=[xmin, xmax]`, in the units of the file.
+    The range is found with a binary search over the x-axis, and only that slice of the values and errors is read:
+    contiguous datasets are memory-mapped, and chunked or compressed datasets are read chunk by chunk by HDF5,
+    so that the memory usage scales with the requested data instead of the file size.
+    Histogram data is converted to point data, with `X` at the bin centres.
+    The workspace is read from the first `mantid_workspace_*` group, unless another `entry` is specified.
+    '''
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError('read_nexus: the h5py package is required to read NeXus/HDF5 files; install it with `pip install h5py`')
+    with h5py.File(filename, 'r') as f:
+        workspace = _nexus_workspace(f, entry)
+        values = _nexus_dataset(workspace['values'], filename)
+        errors = _nexus_dataset(workspace['errors'], filename) if 'errors' in workspace else None
+        axis = workspace['axis1']
+        spectra = values.shape[0] if len(values.shape) > 1 else 1
+        if indices is None:
+            indices = range(spectra)
+        elif np.ndim(indices) == 0:
+            indices = [indices]
+        shared_axis = axis[()] if axis.ndim == 1 else None
+        results = []
+        for i in indices:
+            if not -spectra <= i < spectra:
+                raise IndexError(f'read_nexus: spectrum index {i} out of range for {spectra} spectra in {filename}')
+            x = shared_axis if shared_axis is not None else axis[i]
+            bins = values.shape[-1]
+            if len(x) == bins + 1:
+                x = (x[:-1] + x[1:]) / 2
+            window = _nexus_window(x, xrange)
+            row = (i, window) if len(values.shape) > 1 else window
+            data = [x[window], values[row]]
+            if errors is not None:
+                data.append(errors[row])
+            data = np.array(data, dtype=float)
+            columns = ['X', 'Y', 'E'] if errors is not None else ['X', 'Y']
+            results.append((columns, _sort(data)))
+    return results
+
+
+def nexus_unit(
+        filename:str,
+        entry:str=None,
+    ):
+    '''
+    Units of the x-axis of a MANTID workspace saved as a NeXus/HDF5 file, as `'meV'` or `'cm-1'`.
+    Returns the MANTID unit ID if it is not an energy listed in `maatpy.files.nexus_units`,
+    or `None` if the axis has no units.
+    '''
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError('nexus_unit: the h5py package is required to read NeXus/HDF5 files; install it with `pip install h5py`')
+    with h5py.File(filename, 'r') as f:
+        unit = _nexus_workspace(f, entry)['axis1'].attrs.get('units')
+    if unit is None:
+        return None
+    if isinstance(unit, bytes):
+        unit = unit.decode()
+    unit = str(unit)
+    return nexus_units.get(unit, unit)
+
+
+def _nexus_workspace(f, entry:str=None):
+    '''Get the `workspace` group of a NeXus file, from the given `entry` or from the first MANTID workspace.'''
+    if entry is None:
+        entries = [name for name in f.keys() if name.startswith('mantid_workspace')]
+        if not entries:
+            entries = [name for name in f.keys() if 'workspace' in f[name]]
+        if not entries:
+            raise ValueError(f'read_nexus: no MANTID workspace found in {f.filename}')
+        entries.sort(key=lambda name: [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)])
+        entry = entries[0]
+    return f[entry]['workspace']
+
+
+def _nexus_dataset(dataset, filename:str):
+    '''
+    Memory-map a contiguous and uncompressed HDF5 dataset, or return the dataset itself otherwise,
+    to be sliced directly with h5py. In both cases only the sliced data is read.
+    '''
+    if dataset.chunks is not None or dataset.compression is not None:
+        return dataset
+    offset = dataset.id.get_offset()
+    if offset is None:  # Not allocated in the file
+        return dataset
+    return np.memmap(filename, dtype=dataset.dtype, mode='r', offset=offset, shape=dataset.shape)
+
+
+def _nexus_window(x, xrange:list=None) -> slice:
+    '''Slice with the points of a sorted x-axis inside `xrange=[xmin, xmax]`.'''
+    if xrange is None:
+        return slice(None)
+    if len(x) > 1 and x[0] > x[-1]:  # Descending axis
+        stop = len(x) if xrange[0] is None else len(x) - int(np.searchsorted(x[::-1], xrange[0], side='left'))
+        start = 0 if len(xrange) < 2 or xrange[1] is None else len(x) - int(np.searchsorted(x[::-1], xrange[1], side='right'))
+        return slice(start, stop)
+    start = 0 if xrange[0] is None else int(np.searchsorted(x, xrange[0], side='left'))
+    stop = len(x) if len(xrange) < 2 or xrange[1] is None else int(np.searchsorted(x, xrange[1], side='right'))
+    return slice(start, stop)
+
+
+parquet_key = b'maatpy'
+'''Key of the MaatPy metadata inside the schema of the Parquet files written by `write_parquet()`.'''
+
+
+def write_parquet(
+        filename:str,
+        data:list,
+        metadata:dict=None,
+    ) -> None:
+    '''
+    Write several datasets to a single columnar Parquet file. Requires the optional `pyarrow` package.
+    The `data` is a list with a tuple `(x, y, error)` of arrays for each dataset, where `error` can be `None`.
+    The datasets are stored one after the other in the `x`, `y` and `error` columns,
+    with one row group per dataset, so that `read_parquet()` can read only some of them.
+    The `metadata` dict is stored as JSON in the file schema.
+    '''
+    pa, pq = _pyarrow('write_parquet')
+    dtype = np.result_type(*[np.asarray(x).dtype for x, _, _ in data]) if data else np.dtype(float)
+    arrow_type = pa.from_numpy_dtype(dtype)
+    row_groups = []
+    group = 0
+    for x, _, _ in data:  # Empty datasets are not written
+        row_groups.append(group if len(x) else None)
+        group += 1 if len(x) else 0
+    metadata = dict(metadata or {})
+    metadata['rows'] = [len(x) for x, _, _ in data]
+    metadata['row_groups'] = row_groups
+    metadata['has_error'] = [error is not None for _, _, error in data]
+    schema = pa.schema(
+        [('x', arrow_type), ('y', arrow_type), ('error', arrow_type)],
+        metadata={parquet_key: json.dumps(metadata, default=_json_default).encode()},
+    )
+    with pq.ParquetWriter(filename, schema) as writer:
+        for x, y, error in data:
+            if not len(x):
+                continue
+            error = pa.nulls(len(x), arrow_type) if error is None else pa.array(np.asarray(error, dtype=dtype))
+            x = pa.array(np.asarray(x, dtype=dtype))
+            y = pa.array(np.asarray(y, dtype=dtype))
+            writer.write_table(pa.Table.from_arrays([x, y, error], schema=schema))
+
+
+def read_parquet(
+        filename:str,
+        indices=None,
+        errors:bool=True,
+    ) -> tuple:
+    '''
+    Read the datasets of a Parquet file written by `write_parquet()`. Requires the optional `pyarrow` package.
+    Returns a tuple with a list of `(x, y, error)` arrays for each dataset, and the stored metadata dict.
+    Only the row groups of the datasets listed in `indices` are read, which can be a single index or a list;
+    all of them by default. Set `errors=False` to skip reading the `error` column, which is then `None`.
+    Note that the metadata lists, such as `rows`, always contain the values of all the stored datasets.
+    '''
+    pa, pq = _pyarrow('read_parquet')
+    parquet = pq.ParquetFile(filename)
+    schema_metadata = parquet.schema_arrow.metadata or {}
+    if parquet_key not in schema_metadata:
+        raise ValueError(f'read_parquet: {filename} was not written by MaatPy')
+    metadata = json.loads(schema_metadata[parquet_key])
+    total = len(metadata['rows'])
+    if indices is None:
+        indices = range(total)
+    elif np.ndim(indices) == 0:
+        indices = [indices]
+    columns = ['x', 'y', 'error'] if errors else ['x', 'y']
+    dtype = parquet.schema_arrow.field('x').type.to_pandas_dtype()
+    data = []
+    for i in indices:
+        if not -total <= i < total:
+            raise IndexError(f'read_parquet: dataset index {i} out of range for {total} datasets in {filename}')
+        group = metadata['row_groups'][i]
+        if group is None:
+            empty = np.empty(0, dtype=dtype)
+            data.append((empty, empty.copy(), empty.copy() if errors and metadata['has_error'][i] else None))
+            continue
+        table = parquet.read_row_group(group, columns=columns)
+        x = table.column('x').to_numpy()
+        y = table.column('y').to_numpy()
+        error = table.column('error').to_numpy() if errors and metadata['has_error'][i] else None
+        data.append((x, y, error))
+    return data, metadata
+
+
+def _pyarrow(function:str) -> tuple:
+    '''Import the optional `pyarrow` modules, with a helpful error if they are not installed.'''
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(f'{function}: the pyarrow package is required to read and write Parquet files; install it with `pip install pyarrow`')
+    return pyarrow, pyarrow.parquet
+
+
+def _json_default(value):
+    '''Convert NumPy values and sets to JSON types, when writing metadata.'''
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, set):
+        return list(value)
+    return str(value)
+
+
+def read_many(
+        filenames:list,
+        workers:int=None,
+        processes:bool=False,
+        cache=False,
+        xrange:list=None,
+        chunksize:int=None,
+    ) -> tuple:
+    '''
+    Read several CSV files in parallel with `read()`.
+
+    The files are read with a pool of threads, or with a pool of processes if `processes=True`.
+    The number of `workers` defaults to the number of available CPUs.
+    Returns a tuple with the list of results, in the same order as `filenames`,
+    and a dict with the files that could not be read, as `{filename: 'error message'}`.
+    Each result is a tuple with the column names and the data array as returned by `read()`,
+    and the time in seconds spent reading the file.
+    The results of the files that could not be read are set to `None`,
+    so that a single bad file does not stop the rest of the batch.
+    The binary `cache`, `xrange` and `chunksize` options are used as in `read()`.
+    '''
+    if processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    results = []
+    errors = {}
+    with executor:
+        futures = [executor.submit(_read_timed, filename, cache, xrange, chunksize) for filename in filenames]
+        for filename, future in zip(filenames, futures):
+            try:
+                results.append(future.result())
+            except Exception as error:
+                results.append(None)
+                errors[filename] = f'{type(error).__name__}: {error}'
+    return results, errors
+
+
+def _read_timed(*args) -> tuple:
+    '''Call `read()`, returning also the time spent, in seconds.'''
+    start = time.perf_counter()
+    columns, data = read(*args)
+    return columns, data, time.perf_counter() - start
+
+
+def index(
+        folder:str='.',
+        pattern:str='*.csv',
+        recursive:bool=False,
+    ) -> pd.DataFrame:
+    '''
+    Build a lightweight index of the data files inside a `folder` that match a glob `pattern`,
+    searching also inside subfolders if `recursive=True`.
+    Only the header and the first and last data lines of each file are read, so no data is parsed.
+    Compressed files must still be decompressed up to the end to find their last line.
+    Returns a pandas dataframe with one row per file, and the following columns:
+    `filename`, `size` in bytes, `mtime` as a POSIX timestamp, `header` with the commented lines at the beginning of the file,
+    and `xmin` and `xmax` with the range of the first column, in the units of the file.
+    The x-range assumes that the data is sorted, in ascending or descending order; it is `NaN` if it can not be read.
+
+    The index can be filtered as any other dataframe, and then loaded with `maatpy.classes.Spectra.from_index()`.
+    '''
+    if recursive:
+        paths = glob.glob(os.path.join(folder, '**', pattern), recursive=True)
+    else:
+        paths = glob.glob(os.path.join(folder, pattern))
+    rows = []
+    for path in sorted(paths):
+        if not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        header, xmin, xmax = _peek(path)
+        rows.append({
+            'filename': path,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'header': header,
+            'xmin': xmin,
+            'xmax': xmax,
+        })
+    return pd.DataFrame(rows, columns=['filename', 'size', 'mtime', 'header', 'xmin', 'xmax'])
+
+
+def _peek(filename:str) -> tuple:
+    '''Read the header, and the x-values of the first and last data lines of a file.'''
+    header = []
+    first = None
+    with _open(filename, 'rb') as f:
+        for line in f:
+            line = line.decode(errors='replace').strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                if first is None:
+                    header.append(line.lstrip('#').strip())
+                continue
+            first = _first_value(line)
+            if first is not None:
+                break
+        # Read the end of the file to get the last data line
+        if is_compressed(filename):  # Can not seek, so decompress until the end
+            tail = b''.join(collections.deque(f, maxlen=64))
+        else:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            tail = f.read()
+        last = None
+        for line in reversed(tail.decode(errors='replace').splitlines()):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                last = _first_value(line)
+                break
+    if first is None or last is None:
+        return ' '.join(header), np.nan, np.nan
+    return ' '.join(header), min(first, last), max(first, last)
+
+
+def _first_value(line:str):
+    '''Value of the first column of a line, or `None` if it is not a number, e.g. in headers.'''
+    try:
+        return float(line.split(',')[0])
+    except ValueError:
+        return None
@@ -0,0 +1,89 @@
+'''
+# Description
+This module manages the messages printed by MaatPy, such as the summary of each loaded file
+or the results of `maatpy.deuteration` analyses.
+Messages go through the standard `logging` module, with the `'maatpy'` logger,
+and are printed to the standard output by default.
+
+To run silently, e.g. when loading thousands of files, call `maatpy.log.quiet()`.
+Only warnings are printed then; to recover the default messages, call `maatpy.log.verbose()`:
+```python
+import maatpy as mt
+mt.log.quiet()
+ins = mt.Spectra(filename=filenames, workers=8)
+mt.log.verbose()
+```
+Any other level from the `logging` module can be set with `maatpy.log.set_level()`,
+and the logger can also be configured directly with `logging.getLogger('maatpy')`.
+Messages go to the current `sys.stdout` at the time of printing, so `contextlib.redirect_stdout()` also captures them.
+They do not propagate to the root logger, to avoid printing them twice;
+set `logging.getLogger('maatpy').propagate = True` and remove its handler to route them through your own logging configuration.
+
+# Index
+- `quiet()`
+- `verbose()`
+- `set_level()`
+- `enabled()`
+- `info()`
+- `warning()`
+
+---
+'''
+
+
+import sys
+import logging
+
+
+class _StdoutHandler(logging.StreamHandler):
+    '''Handler that prints to the current `sys.stdout`, resolved at each message instead of at import.'''
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+logger = logging.getLogger('maatpy')
+'''Logger used by MaatPy to print its messages.'''
+if not logger.handlers:
+    _handler = _StdoutHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def quiet() -> None:
+    '''Print only warnings and errors.'''
+    logger.setLevel(logging.WARNING)
+
+
+def verbose() -> None:
+    '''Print all the informative messages. This is the default behaviour.'''
+    logger.setLevel(logging.INFO)
+
+
+def set_level(level) -> None:
+    '''Set the `level` of the messages to print, as in the `logging` module, e.g. `logging.ERROR` or `'ERROR'`.'''
+    logger.setLevel(level)
+
+
+def enabled(level=logging.INFO) -> bool:
+    '''Check whether messages of a given `level` are printed. Useful to skip building messages that will not be shown.'''
+    return logger.isEnabledFor(level)
+
+
+def info(message:str) -> None:
+    '''Print an informative message.'''
+    logger.info(message)
+
+
+def warning(message:str) -> None:
+    '''Print a warning.'''
+    logger.warning(f'WARNING: {message}')
@@ -12,23 +12,29 @@ This module contains functions to normalize data and other variables.
 
 
 from . import alias
+from . import log
 from .classes import *
 from .fit import *
 from .constants import *
+import numpy as np
 
 
 def unit_str(unit:str):
     '''Normalize a given unit string to a standarized unit string, following `maatpy.alias.unit`.'''
-    for key, value in alias.unit.items():
-        if unit in value:
-            return key
-    print(f"WARNING: Unknown unit '{unit}'")
-    return unit
+    key = alias.find(unit, alias.unit)
+    if key is None:
+        log.warning(f"Unknown unit '{unit}'")
+        return unit
+    return key
 
 
 def spectra(spectra:Spectra):
-    '''Normalize the given spectra by height, with optional `maatpy.classes.ScaleRange` attributes.'''
-    sdata = deepcopy(spectra)
+    '''
+    Normalize the given spectra by height, with optional `maatpy.classes.ScaleRange` attributes.
+    Datasets that share the same x-grid are normalized together, with a single reduction and product;
+    see `maatpy.classes.Spectra.grids()`.
+    '''
+    sdata = spectra.view()
     if hasattr(sdata, 'scale_range') and sdata.scale_range is not None:
         scale_range = sdata.scale_range
         if scale_range.ymax:
@@ -37,82 +43,86 @@ def spectra(spectra:Spectra):
         scale_range = ScaleRange()
 
     df_index = scale_range.index if scale_range.index else 0
-    df0 = sdata.dataframe[df_index]
+    spectrum0 = sdata.data[df_index]
 
     if scale_range.xmin is None:
-        scale_range.xmin = min(df0[df0.columns[0]])
+        scale_range.xmin = spectrum0.x[0]
     if scale_range.xmax is None:
-        scale_range.xmax = max(df0[df0.columns[0]])
+        scale_range.xmax = spectrum0.x[-1]
 
     sdata.scale_range = scale_range
 
     xmin = scale_range.xmin
     xmax = scale_range.xmax
 
-    df0 = df0[(df0[df0.columns[0]] >= xmin) & (df0[df0.columns[0]] <= xmax)]
-    ymax_on_range = df0[df0.columns[1]].max()
-    normalized_dataframes = []
-    for df in sdata.dataframe:
-        df_range = df[(df[df.columns[0]] >= xmin) & (df[df.columns[0]] <= xmax)]
-        i_ymax_on_range = df_range[df_range.columns[1]].max()
-        df[df.columns[1]] =  df[df.columns[1]] * ymax_on_range / i_ymax_on_range
-        normalized_dataframes.append(df)
-    sdata.dataframe = normalized_dataframes
+    ymax_on_range = spectrum0.y[spectrum0.window(xmin, xmax)].max()
+    # Datasets sharing the same x-grid are scaled together as a 2D array
+    for indices, _ in sdata.grids():
+        window = sdata.data[indices[0]].window(xmin, xmax)
+        y = _stack([sdata.data[i].y for i in indices])
+        y = y * (ymax_on_range / y[:, window].max(axis=1))[:, np.newaxis]
+        for i, row in zip(indices, y):
+            sdata.data[i].y = row
     return sdata
 
 
+def _stack(arrays:list):
+    '''Stack arrays of the same length as the rows of a 2D array, without copying a single array.'''
+    if len(arrays) == 1:
+        return arrays[0][np.newaxis]
+    return np.stack(arrays)
+
+
 def _spectra_y(sdata:Spectra):
-    if not len(sdata.scale_range.ymax) == len(sdata.dataframe):
+    if not len(sdata.scale_range.ymax) == len(sdata.data):
         raise ValueError("normalize: len(ymax) does not match len(dataframe)")
     scale_range = sdata.scale_range
     ymax = scale_range.ymax
     ymin = scale_range.ymin if scale_range.ymin else [0.0]
     if len(ymin) == 1:
-        ymin = ymin * len(sdata.dataframe)
+        ymin = ymin * len(sdata.data)
     index = scale_range.index if scale_range.index else 0
     reference_height = ymax[index] - ymin[index]
-    normalized_dataframes = []
-    for i, df in enumerate(sdata.dataframe):
+    for i, spectrum in enumerate(sdata.data):
         height = ymax[i] - ymin[i]
-        df[df.columns[1]] =  df[df.columns[1]] * reference_height / height
-        normalized_dataframes.append(df)
-    sdata.dataframe = normalized_dataframes
+        spectrum.y = spectrum.y * reference_height / height
     return sdata
 
 
 def area(spectra:Spectra):
     '''
     Normalize the given spectra by the area under the datasets, with optional `maatpy.classes.ScaleRange` attributes.
+    The areas are computed above the minimum of each dataset inside the range, for all datasets in a single call
+    to `maatpy.fit.areas_under_peaks()`; both the `y` values and the errors are scaled by the same factor.
     '''
-    sdata = deepcopy(spectra)
+    sdata = spectra.view()
     if hasattr(sdata, 'scale_range') and sdata.scale_range is not None:
         scale_range = sdata.scale_range
         if scale_range.ymax:
-            return _normalize_y(sdata)
+            return _spectra_y(sdata)
     else:
         scale_range = ScaleRange()
 
     df_index = scale_range.index if scale_range.index else 0
-    df0 = sdata.dataframe[df_index]
+    spectrum0 = sdata.data[df_index]
 
     if scale_range.xmin is None:
-        scale_range.xmin = min(df0[df0.columns[0]])
+        scale_range.xmin = spectrum0.x[0]
     if scale_range.xmax is None:
-        scale_range.xmax = max(df0[df0.columns[0]])
+        scale_range.xmax = spectrum0.x[-1]
 
     sdata.scale_range = scale_range
 
     xmin = scale_range.xmin
     xmax = scale_range.xmax
 
-    df0 = df0[(df0[df0.columns[0]] >= xmin) & (df0[df0.columns[0]] <= xmax)]
-    area_df0, _ = area_under_peak(sdata, peak=[xmin,xmax], df_index=df_index, min_as_baseline=True)
-    normalized_dataframes = []
-    for df_i, df in enumerate(sdata.dataframe):
-        area_df, _ = area_under_peak(sdata, peak=[xmin,xmax], df_index=df_i, min_as_baseline=True)
-        scaling = area_df0 / area_df
-        df[df.columns[1]] =  df[df.columns[1]] * scaling
-        normalized_dataframes.append(df)
-    sdata.dataframe = normalized_dataframes
+    areas, _ = areas_under_peaks(sdata, [[xmin, xmax]], df_index=None, min_as_baseline=True)
+    areas = areas[:, 0]
+    scaling = areas[df_index] / areas
+    for spectrum, factor in zip(sdata.data, scaling):
+        # Keep the dtype of the data, such as float32, instead of promoting it to the float64 of the areas
+        factor = spectrum.y.dtype.type(factor)
+        spectrum.y = spectrum.y * factor
+        if spectrum.error is not None:
+            spectrum.error = spectrum.error * factor
     return sdata
-
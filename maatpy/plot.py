@@ -21,20 +21,18 @@ def spectra(spectrum:Spectra):
     '''
 
     strings_to_delete_from_name = ['.csv', '.dat', '.txt', '_INS', '_ATR', '_FTIR', '_temp', '_RAMAN', '_Raman', '/data/', 'data/', '/csv/', 'csv/', '/INS/', 'INS/', '/FTIR/', 'FTIR/', '/ATR/', 'ATR/', '_smooth', '_smoothed', '_subtracted', '_cellsubtracted']
-    normalize_area_keys = alias.parameters['area']
-    normalize_height_keys = alias.parameters['height']
-    normalize_height_keys.extend(alias.boolean[True])
 
-    sdata = deepcopy(spectrum)
+    sdata = spectrum.view()
 
     if hasattr(sdata, 'plotting') and sdata.plotting.figsize:
         fig, ax = plt.subplots(figsize=sdata.plotting.figsize)
     else:
         fig, ax = plt.subplots()
 
-    if sdata.plotting.normalize in normalize_height_keys:
+    normalize_key = alias.find(sdata.plotting.normalize, alias.parameters)
+    if normalize_key == 'height' or alias.find(sdata.plotting.normalize, alias.boolean) is True:
         sdata = normalize.spectra(sdata)
-    elif sdata.plotting.normalize in normalize_area_keys:
+    elif normalize_key == 'area':
         sdata = normalize.area(sdata)
 
     calculated_low_ylim, calculated_top_ylim = _get_ylimits(sdata)
@@ -48,47 +46,47 @@ def spectra(spectrum:Spectra):
         title = sdata.plotting.title
         low_xlim = sdata.plotting.xlim[0]
         top_xlim = sdata.plotting.xlim[1]
-        xlabel = sdata.plotting.xlabel if sdata.plotting.xlabel is not None else sdata.dataframe[0].columns[0]
-        ylabel = sdata.plotting.ylabel if sdata.plotting.ylabel is not None else sdata.dataframe[0].columns[1]
+        xlabel = sdata.plotting.xlabel if sdata.plotting.xlabel is not None else sdata.data[0].columns[0]
+        ylabel = sdata.plotting.ylabel if sdata.plotting.ylabel is not None else sdata.data[0].columns[1]
     else:
         title = sdata.comment
 
-    number_of_plots = len(sdata.dataframe)
+    number_of_plots = len(sdata.data)
     height = top_ylim - low_ylim
     if hasattr(sdata, 'plotting') and sdata.plotting.offset is True:
-        for i, df in enumerate(sdata.dataframe):
+        for i, spectrum in enumerate(sdata.data):
             reverse_i = (number_of_plots - 1) - i
-            df[df.columns[1]] = df[df.columns[1]] + (reverse_i * height)
+            spectrum.y = spectrum.y + (reverse_i * height)
     elif hasattr(sdata, 'plotting') and (isinstance(sdata.plotting.offset, float) or isinstance(sdata.plotting.offset, int)):
         offset = sdata.plotting.offset
-        for i, df in enumerate(sdata.dataframe):
+        for i, spectrum in enumerate(sdata.data):
             reverse_i = (number_of_plots - 1) - i
-            df[df.columns[1]] = df[df.columns[1]] + (reverse_i * offset)
+            spectrum.y = spectrum.y + (reverse_i * offset)
     _, calculated_top_ylim = _get_ylimits(sdata)
     top_ylim = calculated_top_ylim if not hasattr(sdata, 'plotting') or sdata.plotting.ylim[1] is None else sdata.plotting.ylim[1]
 
     if hasattr(sdata, 'plotting') and hasattr(sdata.plotting, 'legend'):
         if sdata.plotting.legend == False:
-            for df in sdata.dataframe:
-                df.plot(x=df.columns[0], y=df.columns[1], ax=ax)
+            for spectrum in sdata.data:
+                ax.plot(spectrum.x, spectrum.y, label=spectrum.columns[1])
         elif sdata.plotting.legend != None:
-            if len(sdata.plotting.legend) == len(sdata.dataframe):
-                for i, df in enumerate(sdata.dataframe):
+            if len(sdata.plotting.legend) == len(sdata.data):
+                for i, spectrum in enumerate(sdata.data):
                     if sdata.plotting.legend[i] == False:
                         continue  # Skip plots with False in the legend
                     clean_name = sdata.plotting.legend[i]
-                    df.plot(x=df.columns[0], y=df.columns[1], label=clean_name, ax=ax)
+                    ax.plot(spectrum.x, spectrum.y, label=clean_name)
             elif len(sdata.plotting.legend) == 1:
                 clean_name = sdata.plotting.legend[0]
-                for i, df in enumerate(sdata.dataframe):
-                    df.plot(x=df.columns[0], y=df.columns[1], label=clean_name, ax=ax)
-        elif sdata.plotting.legend == None and len(sdata.filename) == len(sdata.dataframe):
-            for df, name in zip(sdata.dataframe, sdata.filename):
+                for i, spectrum in enumerate(sdata.data):
+                    ax.plot(spectrum.x, spectrum.y, label=clean_name)
+        elif sdata.plotting.legend == None and len(sdata.filename) == len(sdata.data):
+            for spectrum, name in zip(sdata.data, sdata.filename):
                 clean_name = name
                 for string in strings_to_delete_from_name:
                     clean_name = clean_name.replace(string, '')
                 clean_name = clean_name.replace('_', ' ')
-                df.plot(x=df.columns[0], y=df.columns[1], label=clean_name, ax=ax)
+                ax.plot(spectrum.x, spectrum.y, label=clean_name)
 
     plt.title(title)
     plt.xlabel(xlabel)
@@ -135,27 +133,21 @@ def spectra(spectrum:Spectra):
 
 def _get_ylimits(spectrum:Spectra) -> tuple[float, float]:
     all_y_values = []
-    for df in spectrum.dataframe:
-        df_trim = df
-        if hasattr(spectrum, 'plotting') and spectrum.plotting.xlim[0] is not None:
-            df_trim = df_trim[(df_trim[df_trim.columns[0]] >= spectrum.plotting.xlim[0])]
-        if hasattr(spectrum, 'plotting') and spectrum.plotting.xlim[1] is not None:
-            df_trim = df_trim[(df_trim[df_trim.columns[0]] <= spectrum.plotting.xlim[1])]
-        all_y_values.extend(df_trim[df_trim.columns[1]].tolist())
-    calculated_low_ylim = min(all_y_values)
-    calculated_top_ylim = max(all_y_values)
+    xlim = spectrum.plotting.xlim if hasattr(spectrum, 'plotting') else [None, None]
+    for data in spectrum.data:
+        all_y_values.append(data.y[data.window(xlim[0], xlim[1])])
+    all_y_values = np.concatenate(all_y_values)
+    calculated_low_ylim = all_y_values.min()
+    calculated_top_ylim = all_y_values.max()
 
     ymax_on_range = None
     if hasattr(spectrum, 'scale_range') and spectrum.scale_range is not None:
         df_index = spectrum.scale_range.index if spectrum.scale_range.index else 0
-        df0 = spectrum.dataframe[df_index]
-        if spectrum.scale_range.xmin:
-            df0 = df0[(df0[df0.columns[0]] >= spectrum.scale_range.xmin)]
-        if spectrum.scale_range.xmax:
-            df0 = df0[(df0[df0.columns[0]] <= spectrum.scale_range.xmax)]
-        ymax_on_range = df0[df0.columns[1]].max()
+        data0 = spectrum.data[df_index]
+        xmin = spectrum.scale_range.xmin if spectrum.scale_range.xmin else None
+        xmax = spectrum.scale_range.xmax if spectrum.scale_range.xmax else None
+        ymax_on_range = data0.y[data0.window(xmin, xmax)].max()
         if spectrum.scale_range.zoom and ymax_on_range is not None:
             calculated_top_ylim = ymax_on_range
 
     return calculated_low_ylim, calculated_top_ylim
-
@@ -0,0 +1,156 @@
+'''
+# Description
+This module manages the in-memory store of the data read from files, shared by all the `Spectra` objects of the process.
+When a file with the same content is read again, e.g. when the same reference file appears
+in several `Spectra` objects or twice in the same list of filenames, it is not parsed again,
+and the new `Spectrum` objects share the arrays already in memory.
+Files are identified by their path, size and modification time, so no data is read to find them in the store.
+Only when another file of the same size is already stored, the contents of both files are hashed and compared,
+so that copies of the same file in different folders are also shared.
+Reads of a window with `xrange` and NeXus files, which only read part of the file, are never stored.
+
+The shared arrays are read-only, so that no `Spectra` object can modify the data of the others.
+To change the values of a dataset, assign new arrays instead, as in `spectrum.y = spectrum.y * 2`,
+or get an independent copy with `maatpy.classes.Spectrum.copy()`.
+The dataframes of `Spectra.dataframe` are always copies, so they can be modified freely.
+
+The store only keeps weak references to the data, which is freed as usual once no `Spectrum` uses it.
+Files read in a pool of processes are shared only inside each process.
+
+The shared arrays are not copy-on-write: in-place changes such as `spectrum.y *= 2`
+raise a `ValueError` on the read-only arrays instead of copying them.
+For this reason the store is disabled by default. To enable it, set `maatpy.store.enabled = True`.
+
+# Index
+- `enabled`
+- `key()`
+- `get()`
+- `put()`
+- `clear()`
+- `size()`
+
+---
+'''
+
+
+import os
+import threading
+import weakref
+from . import cache as sidecar
+
+
+enabled = False
+'''Share the data of identical files between `Spectra` objects, as read-only arrays. Disabled by default.'''
+
+_entries = weakref.WeakValueDictionary()
+'''Data arrays in memory, as `{key: array}`.'''
+
+_columns = {}
+'''Column names of the data arrays in memory, as `{key: columns}`.'''
+
+_sizes = {}
+'''Keys of the stored files of each size, as `{size: [keys]}`, to find the files that may have the same content.'''
+
+_hashes = {}
+'''Content hashes of the stored files that were compared with others, as `{key: hash}`.'''
+
+_lock = threading.RLock()
+
+
+def key(filename:str) -> tuple:
+    '''Key of the data read from `filename`, as a tuple with its absolute path, size and modification time.'''
+    stat = os.stat(filename)
+    return os.path.abspath(filename), stat.st_size, stat.st_mtime_ns
+
+
+def get(key:tuple):
+    '''
+    Get the column names and the read-only data array stored with a given `key`, or `None` if there is no such data.
+    If other files with the same size are stored, their contents are compared,
+    and the data of an identical file is returned and stored for this `key` too.
+    '''
+    with _lock:
+        data = _entries.get(key)
+        if data is not None:
+            return _columns[key], data
+        candidates = [other for other in _sizes.get(key[1], []) if other[0] != key[0] and other in _entries]
+    if not candidates:
+        return None
+    content_hash = _hash(key)
+    for other in candidates:
+        if _hash(other) != content_hash:
+            continue
+        with _lock:
+            data = _entries.get(other)
+            if data is not None:
+                return _add(key, _columns[other], data)
+    return None
+
+
+def put(
+        key:tuple,
+        columns:list,
+        data,
+    ) -> tuple:
+    '''
+    Store the column names and the data array read from a file with a given `key`, making the array read-only.
+    Arrays that are views of other arrays are copied first, so that the stored array is the one kept by the `Spectrum` objects.
+    Returns the stored column names and data, which are the ones stored before if another thread stored them first.
+    '''
+    with _lock:
+        stored = _entries.get(key)
+        if stored is not None:
+            return _columns[key], stored
+        # The arrays of each `Spectrum` only keep the array that owns the memory, so views of other arrays would be freed right away
+        if data.base is not None and data[:0].base is not data:
+            data = data.copy()
+        data.flags.writeable = False
+        return _add(key, columns, data)
+
+
+def clear() -> None:
+    '''Forget all the stored data. Arrays already in use are kept by their `Spectrum` objects, but are not shared anymore.'''
+    with _lock:
+        _entries.clear()
+        _columns.clear()
+        _sizes.clear()
+        _hashes.clear()
+
+
+def size() -> int:
+    '''Number of data arrays currently stored.'''
+    return len(_entries)
+
+
+def _add(key:tuple, columns:list, data) -> tuple:
+    '''Store a read-only data array with a given `key`. Must be called with the lock held.'''
+    _entries[key] = data
+    _columns[key] = columns
+    _sizes.setdefault(key[1], []).append(key)
+    weakref.finalize(data, _forget, key)
+    return columns, data
+
+
+def _hash(key:tuple) -> str:
+    '''Content hash of the file of a `key`, computed only once.'''
+    with _lock:
+        content_hash = _hashes.get(key)
+    if content_hash is None:
+        content_hash = sidecar._hash(key[0])
+        with _lock:
+            _hashes[key] = content_hash
+    return content_hash
+
+
+def _forget(key:tuple) -> None:
+    '''Remove the column names, size and hash of an array that was freed.'''
+    with _lock:
+        if key in _entries:
+            return
+        _columns.pop(key, None)
+        _hashes.pop(key, None)
+        keys = _sizes.get(key[1], [])
+        if key in keys:
+            keys.remove(key)
+        if not keys:
+            _sizes.pop(key[1], None)
@@ -0,0 +1,117 @@
+'''
+# Description
+This module contains the engine to convert the horizontal axis of spectra between energy units.
+It is used by `maatpy.classes.Spectra.set_units()`, but it can also be called directly on arrays.
+
+The energy units `'meV'`, `'eV'`, `'cm-1'`, `'THz'`, `'K'`, `'J'` and `'Ry'` are converted linearly,
+with factors built from `maatpy.constants` and cached for each pair of units; see `factor()`.
+Photon wavelengths in `'nm'` are converted non-linearly, through the inverse of the energy.
+For Raman spectra, the wavelength of the `laser` can be specified,
+so that energies are treated as Raman shifts and wavelengths as absolute wavelengths of the scattered light.
+Units can be written as any of the variants listed in `maatpy.alias.unit`.
+
+# Index
+- `energy`
+- `standard()`
+- `is_linear()`
+- `factor()`
+- `convert()`
+
+---
+'''
+
+
+import functools
+import numpy as np
+from . import alias
+from .constants import *
+
+
+energy = {
+    'meV'  : 1.0,
+    'eV'   : eV_to_meV,
+    'cm-1' : cm_to_meV,
+    'THz'  : THz_to_meV,
+    'K'    : K_to_meV,
+    'J'    : J_to_meV,
+    'Ry'   : Ry_to_eV * eV_to_meV,
+}
+'''Energy units that are converted linearly, as `{unit: value of one unit in meV}`.'''
+
+nm_to_cm = 1.0e7
+'''Product of a wavelength in nm and its energy in cm$^{-1}$.'''
+
+
+def standard(unit):
+    '''
+    Standard name of an energy `unit`, as listed in `maatpy.units.energy`, or `'nm'`.
+    Note that `'cm'` is read as cm$^{-1}$. Unknown units are returned as they are.
+    '''
+    key = alias.find(unit, alias.unit)
+    if key == 'cm':
+        return 'cm-1'
+    if key in energy or key == 'nm':
+        return key
+    return unit
+
+
+def is_linear(
+        unit_in,
+        unit_out,
+    ) -> bool:
+    '''Check whether the conversion between two units is a simple product by a factor.'''
+    return standard(unit_in) in energy and standard(unit_out) in energy
+
+
+@functools.lru_cache(maxsize=None)
+def factor(
+        unit_in,
+        unit_out,
+    ) -> float:
+    '''
+    Factor to convert values from `unit_in` to `unit_out`, for the linear units in `maatpy.units.energy`.
+    The factors are cached for each pair of units. Raises a `ValueError` for other units.
+    '''
+    unit_in = standard(unit_in)
+    unit_out = standard(unit_out)
+    if unit_in not in energy or unit_out not in energy:
+        raise ValueError(f"Unit conversion error between '{unit_out}' and '{unit_in}'")
+    if unit_in == unit_out:
+        return 1.0
+    return energy[unit_in] / energy[unit_out]
+
+
+def convert(
+        values,
+        unit_in,
+        unit_out,
+        laser:float=None,
+    ):
+    '''
+    Convert an array of `values` from `unit_in` to `unit_out`, returning a new array.
+    Conversions from or to wavelengths in `'nm'` are not linear, and may turn ascending values into descending ones.
+    If the `laser` wavelength is given, in nm, energies are Raman shifts from the laser line.
+    '''
+    values = np.asarray(values)
+    if not np.issubdtype(values.dtype, np.floating):
+        values = values.astype(float)
+    unit_in = standard(unit_in)
+    unit_out = standard(unit_out)
+    if unit_in == unit_out:
+        return values.copy()
+    if is_linear(unit_in, unit_out):
+        return values * factor(unit_in, unit_out)
+    if unit_in == 'nm' and unit_out in energy:
+        with np.errstate(divide='ignore'):
+            wavenumber = nm_to_cm / values
+        if laser is not None:
+            wavenumber = nm_to_cm / laser - wavenumber
+        return wavenumber * factor('cm-1', unit_out)
+    if unit_in in energy and unit_out == 'nm':
+        wavenumber = values * factor(unit_in, 'cm-1')
+        if laser is not None:
+            wavenumber = nm_to_cm / laser - wavenumber
+        with np.errstate(divide='ignore'):
+            return nm_to_cm / wavenumber
+    raise ValueError(f"Unit conversion error between '{unit_out}' and '{unit_in}'")
+
@@ -17,7 +17,12 @@ version_path = './maatpy/constants.py'
 fix_dict ={
     '[alias](https://pablogila.github.io/MaatPy/maatpy/alias.html)'             : '`maatpy.alias`',
     '[classes](https://pablogila.github.io/MaatPy/maatpy/classes.html)'         : '`maatpy.classes`',
+    '[files](https://pablogila.github.io/MaatPy/maatpy/files.html)'             : '`maatpy.files`',
+    '[cache](https://pablogila.github.io/MaatPy/maatpy/cache.html)'             : '`maatpy.cache`',
+    '[store](https://pablogila.github.io/MaatPy/maatpy/store.html)'             : '`maatpy.store`',
+    '[log](https://pablogila.github.io/MaatPy/maatpy/log.html)'                 : '`maatpy.log`',
     '[constants](https://pablogila.github.io/MaatPy/maatpy/constants.html)'     : '`maatpy.constants`',
+    '[units](https://pablogila.github.io/MaatPy/maatpy/units.html)'             : '`maatpy.units`',
     '[atoms](https://pablogila.github.io/MaatPy/maatpy/atoms.html)'             : '`maatpy.atoms`',
     '[elements](https://pablogila.github.io/MaatPy/maatpy/elements.html)'       : '`maatpy.elements`',
     '[fit](https://pablogila.github.io/MaatPy/maatpy/fit.html)'                 : '`maatpy.fit`',
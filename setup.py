@@ -24,7 +24,9 @@ setup(
     packages=['maatpy'],
     install_requires=['numpy', 'matplotlib', 'pandas', 'scipy'],
     extras_requires={
-        'dev': ['pytest', 'twine']
+        'dev': ['pytest', 'twine'],
+        'nexus': ['h5py'],
+        'parquet': ['pyarrow'],
         },
     python_requires='>=3',
     license='AGPL-3.0',